@@ -63,3 +63,67 @@ TRACE_DIR = os.getenv("TRACE_DIR", "artifacts/traces")
 # Whether to capture snapshots & screenshots in the trace (both recommended)
 TRACE_SNAPSHOTS = os.getenv("TRACE_SNAPSHOTS", "true").lower() in ("1", "true", "yes")
 TRACE_SCREENSHOTS = os.getenv("TRACE_SCREENSHOTS", "true").lower() in ("1", "true", "yes")
+
+# Allure HTML report engine used by ALLURE_AUTO_GENERATE:
+# 'python' (default) - in-process incremental generator (helpers/allure_report.py), no Java needed
+# 'cli'              - the 'allure generate --clean' command line tool
+ALLURE_REPORT_ENGINE = os.getenv("ALLURE_REPORT_ENGINE", "python").lower()
+
+# Local directory for data kept between runs (test history, ...). Not committed.
+TAF_CACHE_DIR = os.getenv("TAF_CACHE_DIR", ".taf_cache")
+
+# Artifact capture policy for the `page` fixture:
+# 'adaptive' (default) - per test: 'none' for stable tests, 'trace' (lightweight trace) for tests
+#                        without enough history, 'full' (trace + video) for re-runs and recently failed/flaky tests
+# 'none' | 'trace' | 'full' - use that level for every test ('full' is the previous behavior)
+CAPTURE_POLICY = os.getenv("CAPTURE_POLICY", "adaptive").lower()
+
+# Number of consecutive passes after which a test is considered stable (adaptive policy)
+try:
+    CAPTURE_STABLE_RUNS = int(os.getenv("CAPTURE_STABLE_RUNS", "3"))
+except ValueError:
+    CAPTURE_STABLE_RUNS = 3
+
+# Sharding across machines: run only shard i of n (same as `pytest --shard=i/n`), e.g. SHARD=2/4
+SHARD = os.getenv("SHARD") or None
+
+# Recorded per-test durations used to balance the shard plan.
+# All shards of a run must use the same file (e.g. restore the same CI cache on every machine).
+SHARD_DURATIONS_FILE = os.getenv("SHARD_DURATIONS_FILE", os.path.join(TAF_CACHE_DIR, "durations.json"))
+# SHARD_DURATIONS_DIR: where a sharded run writes its own measured durations (shard_i_of_n.json);
+# fold them into SHARD_DURATIONS_FILE with `python -m helpers.sharding merge --durations <dir>`
+SHARD_DURATIONS_DIR = os.getenv("SHARD_DURATIONS_DIR", "artifacts/durations")
+
+# Visual snapshots (pages.base_page.BasePage.assert_snapshot)
+# Directory with baseline images (committed), and where actual/expected/diff images are written on failure
+VISUAL_BASELINE_DIR = os.getenv("VISUAL_BASELINE_DIR", "tests/snapshots")
+VISUAL_DIFF_DIR = os.getenv("VISUAL_DIFF_DIR", "artifacts/visual-diffs")
+
+# VISUAL_UPDATE_BASELINES: if true, store screenshots as new baselines instead of comparing
+VISUAL_UPDATE_BASELINES = os.getenv("VISUAL_UPDATE_BASELINES", "false").lower() in ("1", "true", "yes")
+
+# Default tolerances: per-channel threshold (0..1) and allowed share of differing pixels (0..1)
+try:
+    VISUAL_THRESHOLD = float(os.getenv("VISUAL_THRESHOLD", "0.1"))
+except ValueError:
+    VISUAL_THRESHOLD = 0.1
+
+try:
+    VISUAL_MAX_DIFF_RATIO = float(os.getenv("VISUAL_MAX_DIFF_RATIO", "0.001"))
+except ValueError:
+    VISUAL_MAX_DIFF_RATIO = 0.001
+
+# Credential pool (optional): accounts leased to parallel workers, one account per worker at a time.
+# SAUCE_USERS: comma-separated "username" or "username:password" entries (default password: SAUCE_PASSWORD)
+# SAUCE_USERS_FILE: file with one entry per line, or a .json list of {"username": ..., "password": ...}
+SAUCE_USERS = os.getenv("SAUCE_USERS") or None
+SAUCE_USERS_FILE = os.getenv("SAUCE_USERS_FILE") or None
+
+# Directory with the per-account lock files, shared by all workers on the machine
+USER_LEASE_DIR = os.getenv("USER_LEASE_DIR", os.path.join(TAF_CACHE_DIR, "user_leases"))
+
+# How long (seconds) a worker waits for a free account before failing
+try:
+    USER_LEASE_TIMEOUT = float(os.getenv("USER_LEASE_TIMEOUT", "300"))
+except ValueError:
+    USER_LEASE_TIMEOUT = 300.0
@@ -6,6 +6,7 @@ import subprocess
 import time
 from playwright.sync_api import sync_playwright
 from model.user import User
+from helpers import capture_policy, impact, sharding, user_pool, visual
 
 
 # Try to import centralized config values, but fall back to safe defaults
@@ -64,6 +65,43 @@ KEEP_TRACES = _cfg("KEEP_TRACES", False)
 TRACE_SNAPSHOTS = _cfg("TRACE_SNAPSHOTS", True)
 TRACE_SCREENSHOTS = _cfg("TRACE_SCREENSHOTS", True)
 
+# Local (not committed) store for data kept between runs, e.g. per-test pass/fail history
+TAF_CACHE_DIR = _cfg("TAF_CACHE_DIR", ".taf_cache")
+
+# Adaptive capture policy: 'adaptive' (default) or a fixed level for all tests ('none', 'trace', 'full')
+CAPTURE_POLICY = _cfg("CAPTURE_POLICY", "adaptive")
+CAPTURE_STABLE_RUNS = _cfg("CAPTURE_STABLE_RUNS", 3)
+CAPTURE_HISTORY_FILE = os.path.join(TAF_CACHE_DIR, "capture_history.json")
+
+# Test-impact selection: page-object usage map recorded with --impact-record
+IMPACT_MAP_FILE = os.path.join(TAF_CACHE_DIR, "impact_map.json")
+_impact_map = None
+# Changes against --impact-base, computed once per process: (changes, error)
+_impact_changes = None
+
+# Sharding (--shard=i/n): per-test durations recorded by previous runs drive the shard plan
+SHARD_DURATIONS_FILE = _cfg("SHARD_DURATIONS_FILE", os.path.join(TAF_CACHE_DIR, "durations.json"))
+# Sharded runs write their measurements here instead (merged later, see helpers/sharding.py)
+SHARD_DURATIONS_DIR = _cfg("SHARD_DURATIONS_DIR", "artifacts/durations")
+# This run's per-test durations (setup + call + teardown), collected in the controller
+_run_durations = {}
+# Shard plan summaries ({"shard", "selected", "collected", "fingerprint"}); the controller collects the workers' ones
+_shard_plans = []
+
+# Credential pool: accounts leased to xdist workers (see helpers/user_pool.py)
+SAUCE_USERS = _cfg("SAUCE_USERS", None)
+SAUCE_USERS_FILE = _cfg("SAUCE_USERS_FILE", None)
+USER_LEASE_DIR = _cfg("USER_LEASE_DIR", os.path.join(TAF_CACHE_DIR, "user_leases"))
+USER_LEASE_TIMEOUT = _cfg("USER_LEASE_TIMEOUT", 300)
+# Lease statistics ({"worker", "username", "wait_seconds"}); the controller collects the workers' ones
+_user_lease_stats = []
+
+# Capture history is loaded lazily once per process (workers only read it; the controller updates it)
+_capture_history = None
+# Per-run capture statistics collected in the controller:
+# {"levels": {level: count}, "reasons": {level: {reason: count}}}
+_capture_run_stats = {"levels": {}, "reasons": {}}
+
 
 # Create a filesystem-safe trace/video filename
 def _safe_test_name(nodeid: str) -> str:
@@ -72,6 +110,179 @@ def _safe_test_name(nodeid: str) -> str:
     return name
 
 
+def _get_capture_history() -> dict:
+    global _capture_history
+    if _capture_history is None:
+        _capture_history = capture_policy.load_history(CAPTURE_HISTORY_FILE)
+    return _capture_history
+
+
+def _is_xdist_worker() -> bool:
+    return bool(os.getenv("PYTEST_XDIST_WORKER") or os.getenv("PYTEST_WORKER"))
+
+
+def _get_impact_map() -> dict:
+    global _impact_map
+    if _impact_map is None:
+        _impact_map = impact.load_map(IMPACT_MAP_FILE)
+    return _impact_map
+
+
+def _impact_selection(config, nodeids: list):
+    """
+    Return (selected_nodeids, reason) for --impact-base; selected_nodeids is None for a full run.
+    The git diff is computed only once per process.
+    """
+    global _impact_changes
+    base_ref = config.getoption("impact_base")
+    rootdir = str(config.rootpath)
+    if _impact_changes is None:
+        try:
+            _impact_changes = (impact.get_changes(base_ref, rootdir), None)
+        except Exception as e:
+            _impact_changes = (None, e)
+
+    changes, error = _impact_changes
+    if error is not None:
+        return None, f"could not diff against {base_ref}: {error}"
+    try:
+        return impact.select_tests(nodeids, _get_impact_map(), changes, base_ref, rootdir)
+    except Exception as e:
+        return None, f"impact analysis failed: {e}"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("taf", "test automation framework")
+    group.addoption(
+        "--impact-record",
+        action="store_true",
+        default=False,
+        help="Record which page-object methods each test uses (stored in TAF_CACHE_DIR/impact_map.json).",
+    )
+    group.addoption(
+        "--impact-base",
+        default=None,
+        metavar="GIT_REF",
+        help="Run only tests affected by changes between GIT_REF and the working tree.",
+    )
+    group.addoption(
+        "--shard",
+        default=_cfg("SHARD", None),
+        metavar="I/N",
+        help="Run only shard I of N of a deterministic, duration-balanced shard plan (env: SHARD).",
+    )
+
+
+def _with_namespace(path: str, namespace: str) -> str:
+    # Options/env are inherited by xdist workers, so don't append the namespace twice
+    if os.path.basename(os.path.normpath(path)) == namespace:
+        return path
+    return os.path.join(path, namespace)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    global VIDEO_DIR, TRACE_DIR
+
+    # Record mode: wrap page-object methods (in every process, including xdist workers)
+    if config.getoption("impact_record"):
+        impact.instrument_page_objects(str(config.rootpath))
+
+    # Visual snapshot failure images: per attempt (+ shard) + worker, like videos and traces
+    visual_namespace = [f"attempt_{RUN_ATTEMPT}", WORKER_ID]
+
+    # Sharding: give each shard its own namespace for allure-results, videos, traces and visual diffs.
+    # Runs before allure-pytest's pytest_configure (tryfirst) so --alluredir is already namespaced.
+    shard = config.getoption("shard")
+    if shard:
+        try:
+            shard_index, shard_total = sharding.parse_shard(shard)
+        except ValueError as e:
+            raise pytest.UsageError(str(e))
+        namespace = sharding.shard_namespace(shard_index, shard_total)
+
+        VIDEO_DIR = os.path.join(BASE_VIDEO_DIR, f"attempt_{RUN_ATTEMPT}", namespace, WORKER_ID)
+        TRACE_DIR = os.path.join(BASE_TRACE_DIR, f"attempt_{RUN_ATTEMPT}", namespace, WORKER_ID)
+        visual_namespace.insert(1, namespace)
+
+        default_results = os.path.join("artifacts", "allure-results", f"attempt_{RUN_ATTEMPT}")
+        os.environ["ALLURE_RESULTS_DIR"] = _with_namespace(os.getenv("ALLURE_RESULTS_DIR", default_results), namespace)
+        if getattr(config.option, "allure_report_dir", None):
+            config.option.allure_report_dir = _with_namespace(config.option.allure_report_dir, namespace)
+
+    visual.set_output_namespace(os.path.join(*visual_namespace))
+
+
+def pytest_report_header(config):
+    lines = []
+    if config.getoption("impact_base"):
+        selected, reason = _impact_selection(config, [])
+        mode = "full run" if selected is None else "affected tests only"
+        lines.append(f"impact selection against {config.getoption('impact_base')}: {mode} ({reason})")
+    if config.getoption("shard"):
+        durations = sharding.load_durations(SHARD_DURATIONS_FILE)
+        lines.append(
+            f"shard {config.getoption('shard')} "
+            f"({len(durations['tests'])} recorded test durations in {SHARD_DURATIONS_FILE}, "
+            f"durations fingerprint {sharding.durations_fingerprint(durations)}; "
+            "the plan fingerprint is printed in the summary)"
+        )
+    return lines
+
+
+def _deselect(config, items, keep):
+    deselected = [item for item in items if item.nodeid not in keep]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if item.nodeid in keep]
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Deselect tests not affected by the changes against --impact-base (if given),
+    then keep only this machine's shard of the remaining tests (if --shard is given).
+    """
+    if config.getoption("impact_base"):
+        selected, reason = _impact_selection(config, [item.nodeid for item in items])
+        if selected is not None:
+            _deselect(config, items, set(selected))
+
+    if config.getoption("shard"):
+        shard_index, shard_total = sharding.parse_shard(config.getoption("shard"))
+        nodeids = [item.nodeid for item in items]
+        durations = sharding.load_durations(SHARD_DURATIONS_FILE)
+        plan = sharding.build_plan(nodeids, durations, shard_total)
+        _deselect(config, items, {nodeid for nodeid, shard in plan.items() if shard == shard_index})
+
+        # All shards must report the same fingerprint, otherwise tests are skipped or run twice
+        summary = {
+            "shard": config.getoption("shard"),
+            "selected": len(items),
+            "collected": len(nodeids),
+            "fingerprint": sharding.plan_fingerprint(nodeids, durations, shard_total),
+        }
+        _shard_plans.append(summary)
+        if hasattr(config, "workeroutput"):
+            config.workeroutput["shard_plan"] = summary
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    if item.config.getoption("impact_record"):
+        impact.reset_used_symbols()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_teardown(item, nextitem):
+    # Hand the recorded page-object usage to the controller via the teardown report
+    if item.config.getoption("impact_record"):
+        rep_call = getattr(item, "rep_call", None)
+        item.user_properties.append(("impact", {
+            "symbols": impact.used_symbols(),
+            "complete": bool(rep_call and rep_call.passed),
+        }))
+
+
 def pytest_sessionstart(session):
     """
     Prepare Allure raw-results directory for the current run.
@@ -138,6 +349,101 @@ def pytest_runtest_makereport(item, call):
     setattr(item, "rep_" + rep.when, rep)
 
 
+def pytest_runtest_logreport(report):
+    """
+    Record per-test outcomes and capture statistics for the adaptive capture policy,
+    page-object usage for test-impact selection (--impact-record) and test durations for sharding.
+
+    Runs only in the controller (or the single pytest process): under pytest-xdist the controller
+    receives every worker's reports, so the history file has a single writer.
+    """
+    if _is_xdist_worker():
+        return
+
+    _run_durations[report.nodeid] = _run_durations.get(report.nodeid, 0.0) + report.duration
+
+    history = _get_capture_history()
+    if report.when == "call" or (report.when == "setup" and report.failed):
+        if not report.skipped:
+            capture_policy.record_outcome(history, report.nodeid, passed=report.passed)
+    elif report.when == "teardown":
+        for name, value in report.user_properties:
+            if name == "capture":
+                levels = _capture_run_stats["levels"]
+                levels[value["level"]] = levels.get(value["level"], 0) + 1
+                reasons = _capture_run_stats["reasons"].setdefault(value["level"], {})
+                reasons[value["reason"]] = reasons.get(value["reason"], 0) + 1
+                if value.get("cost_sample", True):
+                    capture_policy.record_cost(history, value["level"], value["seconds"], value["bytes"])
+            elif name == "impact":
+                impact.record_test(_get_impact_map(), report.nodeid, value["symbols"], value["complete"])
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    # xdist controller: collect the credential lease statistics and shard plan sent by the worker
+    workeroutput = getattr(node, "workeroutput", {})
+    _user_lease_stats.extend(workeroutput.get("user_leases", []))
+    if "shard_plan" in workeroutput:
+        _shard_plans.append(workeroutput["shard_plan"])
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print shard plan, capture policy and credential pool statistics."""
+    if _is_xdist_worker():
+        return
+
+    if _shard_plans:
+        terminalreporter.write_sep("-", "shard plan")
+        fingerprints = sorted({plan["fingerprint"] for plan in _shard_plans})
+        plan = _shard_plans[0]
+        terminalreporter.write_line(
+            f"shard {plan['shard']}: {plan['selected']} of {plan['collected']} tests, "
+            f"plan fingerprint {', '.join(fingerprints)} (must be identical on every shard)"
+        )
+        if len(fingerprints) > 1:
+            terminalreporter.write_line("WARNING: workers of this shard built different shard plans", red=True)
+
+    if _user_lease_stats:
+        waits = [stat["wait_seconds"] for stat in _user_lease_stats]
+        terminalreporter.write_sep("-", "credential pool")
+        terminalreporter.write_line(
+            f"{len(_user_lease_stats)} account leases; lease wait total {sum(waits):.1f}s, max {max(waits):.1f}s"
+        )
+        for stat in sorted(_user_lease_stats, key=lambda s: s["worker"]):
+            terminalreporter.write_line(f"  {stat['worker']}: {stat['username']} (waited {stat['wait_seconds']:.1f}s)")
+
+    _write_capture_summary(terminalreporter)
+
+
+def _write_capture_summary(terminalreporter):
+    """Print how many tests ran at each capture level and the capture overhead avoided."""
+    levels = _capture_run_stats["levels"]
+    if not levels:
+        return
+
+    terminalreporter.write_sep("-", "artifact capture")
+    terminalreporter.write_line(f"Capture policy '{CAPTURE_POLICY}':")
+    for level in capture_policy.CAPTURE_LEVELS:
+        reasons = _capture_run_stats["reasons"].get(level, {})
+        details = ", ".join(f"{reason}: {count}" for reason, count in sorted(reasons.items()))
+        terminalreporter.write_line(f"  {level}={levels.get(level, 0)}" + (f" ({details})" if details else ""))
+
+    savings = capture_policy.summarize_savings(_get_capture_history(), levels)
+    if savings:
+        saved_seconds, saved_bytes = savings
+        # Only the capture cost measured in the page fixture is counted: tracing start, trace stop and
+        # the wait for the video file to be finalized. Recording/encoding overhead while the test body runs is not included,
+        # so the time saving is a lower bound.
+        terminalreporter.write_line(
+            f"  avoided ~{saved_bytes / (1024 * 1024):.1f} MB of artifacts and at least ~{saved_seconds:.1f}s "
+            "of trace/video start+finalization (in-test recording overhead not measured) "
+            "compared to full capture for every test"
+        )
+    else:
+        terminalreporter.write_line("  no full-capture cost sample yet to estimate the avoided overhead")
+
+
 # Per-test context + page fixture (isolated)
 @pytest.fixture(scope="function")
 def page(request, browser):
@@ -152,23 +458,52 @@ def page(request, browser):
     os.makedirs(VIDEO_DIR, exist_ok=True)
     os.makedirs(TRACE_DIR, exist_ok=True)
 
-    # Create a fresh context for this test (isolation)
-    context = browser.new_context(
-        viewport={"width": int(BROWSER_WIDTH), "height": int(BROWSER_HEIGHT)},
-        record_video_dir=VIDEO_DIR,
-        record_video_size={"width": int(VIDEO_WIDTH), "height": int(VIDEO_HEIGHT)},
-    )
-
-    # Start tracing on this context
+    # Decide how much to capture for this test (none / lightweight trace / full trace + video)
+    marker = request.node.get_closest_marker("capture")
     try:
-        context.tracing.start(
-            screenshots=bool(TRACE_SCREENSHOTS),
-            snapshots=bool(TRACE_SNAPSHOTS),
-            sources=True,
-        )
-    except Exception:
-        # tracing may not be available on some setups - don't fail tests
-        pass
+        run_attempt = int(RUN_ATTEMPT)
+    except ValueError:
+        run_attempt = 1
+    minimum_level = capture_policy.CAPTURE_NONE
+    if KEEP_VIDEOS:
+        minimum_level = capture_policy.CAPTURE_FULL
+    elif KEEP_TRACES:
+        minimum_level = capture_policy.CAPTURE_TRACE
+    capture_level, capture_reason = capture_policy.choose_capture_level(
+        request.node.nodeid,
+        _get_capture_history(),
+        run_attempt,
+        policy=CAPTURE_POLICY,
+        marker_level=marker.args[0] if marker and marker.args else None,
+        stable_runs=int(CAPTURE_STABLE_RUNS),
+        minimum_level=minimum_level,
+    )
+    capture_seconds = 0.0
+
+    # Create a fresh context for this test (isolation); record video only at "full" capture level
+    context_args = {"viewport": {"width": int(BROWSER_WIDTH), "height": int(BROWSER_HEIGHT)}}
+    if capture_level == capture_policy.CAPTURE_FULL:
+        context_args["record_video_dir"] = VIDEO_DIR
+        context_args["record_video_size"] = {"width": int(VIDEO_WIDTH), "height": int(VIDEO_HEIGHT)}
+    context = browser.new_context(**context_args)
+
+    # Start tracing on this context (if the capture level asks for it).
+    # KEEP_TRACES keeps complete traces (screenshots/sources per TRACE_SCREENSHOTS/TRACE_SNAPSHOTS) even at the
+    # "trace" level; video stays off. Such runs don't feed the "trace" cost average (see pytest_runtest_logreport).
+    trace_level = capture_level
+    if KEEP_TRACES and capture_level == capture_policy.CAPTURE_TRACE:
+        trace_level = capture_policy.CAPTURE_FULL
+    tracing_started = False
+    trace_options = capture_policy.trace_options(trace_level, TRACE_SCREENSHOTS, TRACE_SNAPSHOTS)
+    if trace_options:
+        capture_start = time.perf_counter()
+        try:
+            context.tracing.start(**trace_options)
+            tracing_started = True
+        except Exception:
+            # tracing may not be available on some setups - don't fail tests
+            pass
+        capture_seconds += time.perf_counter() - capture_start
 
     page = context.new_page()
 
@@ -192,16 +527,19 @@ def page(request, browser):
 
         # stop tracing and write zip file (if tracing was started)
         trace_path = None
-        try:
-            safe_name = _safe_test_name(request.node.nodeid)
-            tmp_trace = os.path.join(TRACE_DIR, safe_name + ".zip")
+        if tracing_started:
+            capture_start = time.perf_counter()
             try:
-                context.tracing.stop(path=tmp_trace)
-                trace_path = tmp_trace
+                safe_name = _safe_test_name(request.node.nodeid)
+                tmp_trace = os.path.join(TRACE_DIR, safe_name + ".zip")
+                try:
+                    context.tracing.stop(path=tmp_trace)
+                    trace_path = tmp_trace
+                except Exception:
+                    trace_path = None
             except Exception:
                 trace_path = None
-        except Exception:
-            trace_path = None
+            capture_seconds += time.perf_counter() - capture_start
 
         # video handling: get the video file path (Playwright gives us a path,
         # but the file may be finalized only after context.close())
@@ -258,9 +596,21 @@ def page(request, browser):
         # If there is a video path, wait until it's fully written (or timeout)
         if video_path:
             # If the video lives in a temporary folder Playwright created, it will be finalized after context.close()
+            capture_start = time.perf_counter()
             ok = _wait_for_file_stable(video_path, timeout_sec=15, stable_for=0.5)
             if not ok:
                 print(f"WARNING: video file {video_path} did not stabilize within timeout; proceeding anyway.")
+            capture_seconds += time.perf_counter() - capture_start
+
+        # Report the capture level and its cost to the controller (read in pytest_runtest_logreport).
+        # Seconds = tracing start + tracing stop + wait for the video file; context.close() is not counted.
+        request.node.user_properties.append(("capture", {
+            "level": capture_level,
+            "reason": capture_reason,
+            "seconds": capture_seconds,
+            "bytes": capture_policy.file_size(trace_path) + capture_policy.file_size(video_path),
+            "cost_sample": trace_level == capture_level,
+        }))
 
         # Best-effort attach: copy attachments into allure-results and then attach those copies.
         # Only attempt this when allure is installed and the test actually failed.
@@ -376,7 +726,7 @@ def page(request, browser):
 
 
 @pytest.fixture(scope="session")
-def credentials():
+def credentials(request):
     """
     Provide user credentials read from environment variables.
 
@@ -384,10 +734,34 @@ def credentials():
       - SAUCE_USERNAME
       - SAUCE_PASSWORD
 
+    Optional user pool (for high-parallelism runs):
+      - SAUCE_USERS and/or SAUCE_USERS_FILE: when set, each worker leases its own account from the pool
+        for the whole session, so no two workers use the same account at once.
+
     Usage in tests: add 'credentials' parameter and use credentials.username, credentials.password
     """
-    username = os.getenv("SAUCE_USERNAME")
     password = os.getenv("SAUCE_PASSWORD")
+    users = user_pool.load_users(SAUCE_USERS, SAUCE_USERS_FILE, default_password=password)
+
+    if users:
+        match = re.search(r"\d+$", WORKER_ID)
+        lease = user_pool.lease_user(
+            users,
+            USER_LEASE_DIR,
+            timeout=float(USER_LEASE_TIMEOUT),
+            owner=WORKER_ID,
+            preferred=int(match.group()) if match else 0,
+        )
+        stat = {"worker": WORKER_ID, "username": lease.user.username, "wait_seconds": lease.wait_seconds}
+        _user_lease_stats.append(stat)
+        if hasattr(request.config, "workeroutput"):
+            # sent to the xdist controller when the worker finishes (see pytest_testnodedown)
+            request.config.workeroutput.setdefault("user_leases", []).append(stat)
+        yield lease.user
+        lease.release()
+        return
+
+    username = os.getenv("SAUCE_USERNAME")
 
     if not username or not password:
         raise RuntimeError(
@@ -395,11 +769,12 @@ def credentials():
             "You can create a local .env file (not committed) from .env.example for convenience."
         )
 
-    return User(username=username, password=password)
+    yield User(username=username, password=password)
 
 
 # Optional: automatically generate Allure HTML after pytest run when requested.
-# Usage: set environment variable ALLURE_AUTO_GENERATE=1 before running pytest and ensure the 'allure' CLI is installed.
+# Usage: set environment variable ALLURE_AUTO_GENERATE=1 before running pytest.
+# The report is built in-process by helpers.allure_report; set ALLURE_REPORT_ENGINE=cli to use the 'allure' CLI instead.
 def _has_any_attachments(allure_results_dir: str, videos_dir: str) -> bool:
     """
     Quickly check if any likely attachment files exist in allure results or videos dir.
@@ -480,17 +855,46 @@ def pytest_sessionfinish(session, exitstatus):
     """
     try:
         # If running under pytest-xdist worker, skip HTML generation here.
-        if os.getenv("PYTEST_XDIST_WORKER") or os.getenv("PYTEST_WORKER"):
+        if _is_xdist_worker():
             return
 
+        # Persist pass/fail history + capture costs collected by pytest_runtest_logreport
+        try:
+            capture_policy.save_history(CAPTURE_HISTORY_FILE, _get_capture_history())
+        except Exception as e:
+            print("Warning: could not save capture history:", e)
+
+        try:
+            shard = session.config.getoption("shard")
+            if shard:
+                # The shared file must stay identical on all shards while they run: keep this shard's
+                # measurements apart, `python -m helpers.sharding merge --durations` folds them in afterwards
+                namespace = sharding.shard_namespace(*sharding.parse_shard(shard))
+                sharding.save_shard_durations(os.path.join(SHARD_DURATIONS_DIR, f"{namespace}.json"), _run_durations)
+            else:
+                durations = sharding.load_durations(SHARD_DURATIONS_FILE)
+                sharding.record_durations(durations, _run_durations)
+                sharding.save_durations(SHARD_DURATIONS_FILE, durations)
+        except Exception as e:
+            print("Warning: could not save test durations:", e)
+
+        if session.config.getoption("impact_record"):
+            try:
+                impact.save_map(IMPACT_MAP_FILE, _get_impact_map())
+            except Exception as e:
+                print("Warning: could not save impact map:", e)
+
         auto = os.getenv("ALLURE_AUTO_GENERATE", "0").lower() in ("1", "true", "yes")
         if not auto:
             return
 
-        allure_cmd = shutil.which("allure")
-        if not allure_cmd:
-            print("ALLURE_AUTO_GENERATE is set but 'allure' CLI was not found in PATH. Skipping report generation.")
-            return
+        engine = str(_cfg("ALLURE_REPORT_ENGINE", "python")).lower()
+        allure_cmd = None
+        if engine == "cli":
+            allure_cmd = shutil.which("allure")
+            if not allure_cmd:
+                print("ALLURE_AUTO_GENERATE is set but 'allure' CLI was not found in PATH. Skipping report generation.")
+                return
 
         # Resolve per-attempt defaults consistently with pytest_sessionstart
         # Use RUN_ATTEMPT if provided; default to 1. This ensures sessionfinish
@@ -516,10 +920,21 @@ def pytest_sessionfinish(session, exitstatus):
                 print("Warning: no non-empty attachments detected or attachments still changing after timeout; proceeding to generate report anyway.")
 
         print(f"Generating Allure report from {result_dir} -> {report_dir} ...")
-        try:
-            subprocess.run([allure_cmd, "generate", result_dir, "-o", report_dir, "--clean"], check=True)
-            print(f"Allure report generated: {report_dir}/index.html")
-        except subprocess.CalledProcessError as e:
-            print("Allure CLI failed to generate report:", e)
+        if allure_cmd:
+            try:
+                subprocess.run([allure_cmd, "generate", result_dir, "-o", report_dir, "--clean"], check=True)
+                print(f"Allure report generated: {report_dir}/index.html")
+            except subprocess.CalledProcessError as e:
+                print("Allure CLI failed to generate report:", e)
+        else:
+            # In-process, incremental generation: only changed results/attachments are reprocessed
+            from helpers.allure_report import generate_report
+
+            stats = generate_report(result_dir, report_dir)
+            print(
+                f"Allure report generated: {report_dir}/index.html "
+                f"({stats['tests']} tests; {stats['parsed']} result files parsed, {stats['reused']} reused, "
+                f"{stats['attachments_copied']} attachments copied)"
+            )
     except Exception as e:
         print("Unexpected error when trying to auto-generate Allure report:", e)
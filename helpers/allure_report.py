@@ -0,0 +1,553 @@
+"""
+Python-native, incremental HTML report generator for Allure raw results.
+
+Builds a simplified static HTML report (not the Allure UI: no trends, history, categories or
+timeline) straight from an Allure raw-results directory (``*-result.json``, ``*-container.json``
+and the attachment files they reference), so neither Java nor the ``allure`` CLI is needed to
+look at a run. Use ``allure generate`` (ALLURE_REPORT_ENGINE=cli) for the full Allure report.
+
+Generation is incremental: a manifest stored inside the report directory remembers the
+size/mtime of every result file and attachment already processed. On the next run only
+new or changed result files are parsed, only new or changed attachments are copied and
+only the pages whose content actually changed are rewritten.
+
+Usage:
+    python -m helpers.allure_report artifacts/allure-results/merged -o artifacts/allure-report
+    python -m helpers.allure_report artifacts/allure-results/merged -o artifacts/allure-report --benchmark
+"""
+import argparse
+import html
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+MANIFEST_NAME = ".report-manifest.json"
+MANIFEST_VERSION = 2
+
+# Report layout (relative to the report directory)
+ATTACHMENTS_DIR = os.path.join("data", "attachments")
+TESTS_DIR = os.path.join("data", "tests")
+
+# Display order of statuses (worst first)
+STATUS_ORDER = ("failed", "broken", "passed", "skipped", "unknown")
+
+_CSS = """
+body { font-family: -apple-system, Segoe UI, Roboto, sans-serif; margin: 24px; color: #222; }
+h1 { font-size: 22px; } h2 { font-size: 17px; margin-top: 28px; }
+table { border-collapse: collapse; width: 100%; }
+th, td { text-align: left; padding: 6px 10px; border-bottom: 1px solid #e5e5e5; vertical-align: top; }
+.status { font-weight: 600; text-transform: uppercase; font-size: 12px; }
+.failed { color: #d32f2f; } .broken { color: #f57c00; } .passed { color: #388e3c; }
+.skipped, .unknown { color: #757575; }
+.summary span { margin-right: 18px; }
+pre { background: #f6f6f6; padding: 10px; overflow-x: auto; white-space: pre-wrap; }
+video { max-width: 100%; }
+ul.steps { margin: 0; padding-left: 20px; }
+"""
+
+
+# ----------------------------------------------------------------------------
+# Parsing: each raw file is read on its own and reduced to a small summary entry,
+# so memory use is bounded by the summaries rather than by the raw results.
+# ----------------------------------------------------------------------------
+def _collect_attachments(node: dict, out: list) -> list:
+    """Collect attachments of a result/fixture and all of its (nested) steps."""
+    for att in node.get("attachments") or []:
+        source = att.get("source")
+        if source:
+            out.append({
+                "name": att.get("name") or source,
+                "source": source,
+                "type": att.get("type") or "",
+            })
+    for step in node.get("steps") or []:
+        _collect_attachments(step, out)
+    return out
+
+
+def _summarize_steps(steps) -> list:
+    return [
+        {
+            "name": step.get("name") or "",
+            "status": step.get("status") or "unknown",
+            "steps": _summarize_steps(step.get("steps")),
+        }
+        for step in steps or []
+    ]
+
+
+def _summarize_result(data: dict) -> dict:
+    labels = [[label.get("name"), label.get("value")] for label in data.get("labels") or []]
+    label_map = {}
+    for name, value in labels:
+        label_map.setdefault(name, value)
+
+    details = data.get("statusDetails") or {}
+    start, stop = data.get("start"), data.get("stop")
+    duration_ms = stop - start if isinstance(start, int) and isinstance(stop, int) else None
+
+    return {
+        "kind": "result",
+        "uuid": data.get("uuid") or "",
+        "history_id": data.get("historyId") or data.get("fullName") or data.get("uuid") or "",
+        "name": data.get("name") or data.get("fullName") or "",
+        "full_name": data.get("fullName") or "",
+        "status": data.get("status") or "unknown",
+        "start": start,
+        "stop": stop,
+        "duration_ms": duration_ms,
+        "suite": label_map.get("suite") or label_map.get("parentSuite") or "",
+        "labels": labels,
+        "parameters": [[p.get("name"), p.get("value")] for p in data.get("parameters") or []],
+        "message": details.get("message") or "",
+        "trace": details.get("trace") or "",
+        "steps": _summarize_steps(data.get("steps")),
+        "attachments": _collect_attachments(data, []),
+    }
+
+
+def _summarize_container(data: dict) -> dict:
+    attachments = []
+    for fixture in (data.get("befores") or []) + (data.get("afters") or []):
+        _collect_attachments(fixture, attachments)
+    return {
+        "kind": "container",
+        "children": data.get("children") or [],
+        "attachments": attachments,
+    }
+
+
+# ----------------------------------------------------------------------------
+# Filesystem helpers
+# ----------------------------------------------------------------------------
+def _load_manifest(report_dir: str) -> dict:
+    try:
+        with open(os.path.join(report_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "files": {}, "attachments": {}, "pages": []}
+
+
+def _write_text_atomic(path: str, content: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _write_if_changed(path: str, content: str) -> bool:
+    """Write `content` to `path` unless the file already holds exactly that content."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    _write_text_atomic(path, content)
+    return True
+
+
+def _link_or_copy(src: str, dest: str):
+    """Hard-link `src` to `dest` (no data copied); fall back to a real copy across filesystems."""
+    if os.path.lexists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+# ----------------------------------------------------------------------------
+# Rendering
+# ----------------------------------------------------------------------------
+def _esc(value) -> str:
+    return html.escape("" if value is None else str(value))
+
+
+def _format_duration(duration_ms) -> str:
+    if duration_ms is None:
+        return "-"
+    if duration_ms < 1000:
+        return f"{duration_ms} ms"
+    return f"{duration_ms / 1000:.2f} s"
+
+
+def _status_rank(status: str) -> int:
+    try:
+        return STATUS_ORDER.index(status)
+    except ValueError:
+        return len(STATUS_ORDER)
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>{_esc(title)}</title>\n<style>{_CSS}</style>\n</head>\n"
+        f"<body>\n{body}\n</body>\n</html>\n"
+    )
+
+
+def _render_steps(steps: list) -> str:
+    if not steps:
+        return ""
+    items = "".join(
+        f"<li><span class=\"status {_esc(s['status'])}\">{_esc(s['status'])}</span> "
+        f"{_esc(s['name'])}{_render_steps(s['steps'])}</li>"
+        for s in steps
+    )
+    return f"<ul class=\"steps\">{items}</ul>"
+
+
+def _render_attachment(att: dict) -> str:
+    href = "../attachments/" + att["source"]
+    name = _esc(att["name"])
+    mime = (att.get("type") or "").lower()
+    source = att["source"].lower()
+
+    # Videos recorded by the `page` fixture (video/webm) are embedded directly
+    if mime.startswith("video/") or source.endswith((".webm", ".mp4")):
+        return (
+            f"<p><b>{name}</b></p><video controls preload=\"metadata\" src=\"{_esc(href)}\"></video>"
+            f"<p><a href=\"{_esc(href)}\" download=\"{name}\">download</a></p>"
+        )
+    if mime.startswith("image/"):
+        return f"<p><b>{name}</b></p><img src=\"{_esc(href)}\" alt=\"{name}\" style=\"max-width:100%\">"
+    # Playwright traces (application/zip) can't be viewed inline; point at the trace viewer instead
+    if mime == "application/zip" or source.endswith(".zip"):
+        return (
+            f"<p><b>{name}</b>: <a href=\"{_esc(href)}\" download=\"{name}\">download</a> "
+            f"&mdash; open with <code>playwright show-trace {_esc(att['source'])}</code> "
+            "or https://trace.playwright.dev</p>"
+        )
+    return f"<p><b>{name}</b>: <a href=\"{_esc(href)}\">{_esc(att['source'])}</a></p>"
+
+
+def _render_attempts(result: dict, attempts: list) -> str:
+    """Links to all attempts (retries) of the same test, like Allure's Retries tab."""
+    rows = []
+    for number, attempt in enumerate(attempts, start=1):
+        label = f"attempt {number}"
+        if attempt["uuid"] != result["uuid"]:
+            label = f"<a href=\"{_esc(attempt['uuid'])}.html\">{label}</a>"
+        else:
+            label += " (this page)"
+        rows.append(
+            f"<tr><td>{label}</td>"
+            f"<td><span class=\"status {_esc(attempt['status'])}\">{_esc(attempt['status'])}</span></td>"
+            f"<td>{_esc(_format_duration(attempt['duration_ms']))}</td>"
+            f"<td>{_esc(attempt['message'].splitlines()[0] if attempt['message'] else '')}</td></tr>"
+        )
+    return (
+        "<h2 id=\"retries\">Retries</h2><table><tr><th>Attempt</th><th>Status</th><th>Duration</th>"
+        f"<th>Message</th></tr>{''.join(rows)}</table>"
+    )
+
+
+def _render_test_page(result: dict, fixture_attachments: list, attempts: list) -> str:
+    rows = [
+        ("Status", f"<span class=\"status {_esc(result['status'])}\">{_esc(result['status'])}</span>"),
+        ("Full name", _esc(result["full_name"])),
+        ("Duration", _esc(_format_duration(result["duration_ms"]))),
+    ]
+    rows += [(_esc(name), _esc(value)) for name, value in result["parameters"]]
+    rows += [(_esc(name), _esc(value)) for name, value in result["labels"]]
+    table = "".join(f"<tr><th>{k}</th><td>{v}</td></tr>" for k, v in rows)
+
+    parts = [
+        "<p><a href=\"../../index.html\">&larr; back to overview</a></p>",
+        f"<h1>{_esc(result['name'])}</h1>",
+        f"<table>{table}</table>",
+    ]
+    if result["message"] or result["trace"]:
+        parts.append("<h2>Error</h2>")
+        if result["message"]:
+            parts.append(f"<pre>{_esc(result['message'])}</pre>")
+        if result["trace"]:
+            parts.append(f"<pre>{_esc(result['trace'])}</pre>")
+    if len(attempts) > 1:
+        parts.append(_render_attempts(result, attempts))
+    if result["steps"]:
+        parts.append("<h2>Steps</h2>" + _render_steps(result["steps"]))
+
+    attachments = result["attachments"] + fixture_attachments
+    if attachments:
+        parts.append("<h2>Attachments</h2>")
+        parts.extend(_render_attachment(att) for att in attachments)
+
+    return _page(result["name"], "\n".join(parts))
+
+
+def _render_index(latest: list, attempts: dict) -> str:
+    counts = {}
+    for result in latest:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    summary = "".join(
+        f"<span class=\"status {_esc(status)}\">{_esc(status)}: {counts[status]}</span>"
+        for status in sorted(counts, key=_status_rank)
+    )
+
+    suites = {}
+    for result in latest:
+        suites.setdefault(result["suite"] or "(no suite)", []).append(result)
+
+    sections = []
+    for suite in sorted(suites):
+        rows = []
+        for result in sorted(suites[suite], key=lambda r: (_status_rank(r["status"]), r["name"])):
+            page = f"data/tests/{_esc(result['uuid'])}.html"
+            retry_count = len(attempts[result["history_id"]]) - 1
+            retry_cell = f"<a href=\"{page}#retries\">{retry_count}</a>" if retry_count else ""
+            rows.append(
+                "<tr>"
+                f"<td><span class=\"status {_esc(result['status'])}\">{_esc(result['status'])}</span></td>"
+                f"<td><a href=\"{page}\">{_esc(result['name'])}</a></td>"
+                f"<td>{_esc(_format_duration(result['duration_ms']))}</td>"
+                f"<td>{retry_cell}</td>"
+                "</tr>"
+            )
+        sections.append(
+            f"<h2>{_esc(suite)}</h2><table><tr><th>Status</th><th>Test</th>"
+            f"<th>Duration</th><th>Retries</th></tr>{''.join(rows)}</table>"
+        )
+
+    body = (
+        f"<h1>Test report</h1>\n<p class=\"summary\"><span>total: {len(latest)}</span>{summary}</p>\n"
+        + "\n".join(sections)
+    )
+    return _page("Test report", body)
+
+
+# ----------------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------------
+def generate_report(results_dirs, report_dir: str, clean: bool = False) -> dict:
+    """
+    Generate (or incrementally update) the HTML report in `report_dir` from one or more
+    Allure raw-results directories. Returns counters describing the work performed.
+
+    With `clean=True` the report directory is wiped first (equivalent of `allure generate --clean`).
+    """
+    if isinstance(results_dirs, str):
+        results_dirs = [results_dirs]
+
+    stats = {"parsed": 0, "reused": 0, "attachments_copied": 0, "attachments_removed": 0, "pages_written": 0}
+
+    if clean and os.path.isdir(report_dir):
+        shutil.rmtree(report_dir)
+    os.makedirs(os.path.join(report_dir, ATTACHMENTS_DIR), exist_ok=True)
+    os.makedirs(os.path.join(report_dir, TESTS_DIR), exist_ok=True)
+
+    manifest = _load_manifest(report_dir)
+    old_files = manifest["files"]
+    old_attachments = manifest["attachments"]
+    old_pages = set(manifest["pages"])
+
+    # 1) Stream through the raw files; only parse the ones that changed since last time.
+    # Manifest keys are relative to the report directory, so the manifest holds no machine-specific paths.
+    report_abs = os.path.abspath(report_dir)
+    files = {}
+    changed_keys = set()
+    for results_dir in results_dirs:
+        if not os.path.isdir(results_dir):
+            continue
+        with os.scandir(results_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.endswith(("-result.json", "-container.json")):
+                    continue
+                key = os.path.relpath(os.path.abspath(entry.path), report_abs)
+                st = entry.stat()
+                signature = [st.st_mtime_ns, st.st_size]
+
+                cached = old_files.get(key)
+                if cached and cached["sig"] == signature:
+                    files[key] = cached
+                    stats["reused"] += 1
+                    continue
+
+                try:
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Warning: skipping unreadable Allure result file {entry.path}: {e}")
+                    continue
+
+                if entry.name.endswith("-result.json"):
+                    summary = _summarize_result(data)
+                else:
+                    summary = _summarize_container(data)
+                dir_rel = os.path.relpath(os.path.abspath(results_dir), report_abs)
+                files[key] = {"sig": signature, "dir": dir_rel, "entry": summary}
+                changed_keys.add(key)
+                stats["parsed"] += 1
+
+    # 2) Link results with fixture (container) attachments and resolve retries
+    results = {}
+    fixture_attachments = {}
+    changed_uuids = set()
+    referenced = {}
+    for key, item in files.items():
+        summary = item["entry"]
+        for att in summary["attachments"]:
+            referenced[att["source"]] = os.path.join(report_abs, item["dir"], att["source"])
+        if summary["kind"] == "result":
+            results[summary["uuid"]] = summary
+            if key in changed_keys:
+                changed_uuids.add(summary["uuid"])
+        else:
+            for child in summary["children"]:
+                fixture_attachments.setdefault(child, []).extend(summary["attachments"])
+            if key in changed_keys:
+                changed_uuids.update(summary["children"])
+
+    # A container that disappeared may have contributed attachments to a still-present result,
+    # a result that disappeared changes the retries listed on its siblings' pages
+    changed_history_ids = set()
+    for key, item in old_files.items():
+        if key in files:
+            continue
+        if item["entry"]["kind"] == "container":
+            changed_uuids.update(item["entry"]["children"])
+        else:
+            changed_history_ids.add(item["entry"]["history_id"])
+
+    # Group attempts (retries) of the same test, oldest first; the latest one is shown in the overview
+    attempts = {}
+    for result in results.values():
+        attempts.setdefault(result["history_id"], []).append(result)
+    for history_id, group in attempts.items():
+        group.sort(key=lambda r: (r["stop"] or r["start"] or 0, r["uuid"]))
+        if history_id in changed_history_ids or any(r["uuid"] in changed_uuids for r in group):
+            changed_uuids.update(r["uuid"] for r in group)
+    latest = {history_id: group[-1] for history_id, group in attempts.items()}
+
+    # 3) Sync attachments: copy new/changed ones, drop the ones no longer referenced
+    attachments_root = os.path.join(report_dir, ATTACHMENTS_DIR)
+    attachments = {}
+    for source, src_path in referenced.items():
+        try:
+            st = os.stat(src_path)
+        except OSError:
+            continue
+        signature = [st.st_mtime_ns, st.st_size]
+        dest_path = os.path.join(attachments_root, source)
+        if old_attachments.get(source) != signature or not os.path.exists(dest_path):
+            _link_or_copy(src_path, dest_path)
+            stats["attachments_copied"] += 1
+        attachments[source] = signature
+
+    for source in old_attachments:
+        if source not in attachments:
+            try:
+                os.remove(os.path.join(attachments_root, source))
+                stats["attachments_removed"] += 1
+            except OSError:
+                pass
+
+    # 4) Rewrite only the test pages that changed (or are missing), drop stale ones
+    tests_root = os.path.join(report_dir, TESTS_DIR)
+    for uuid, result in results.items():
+        page_path = os.path.join(tests_root, f"{uuid}.html")
+        if uuid in changed_uuids or uuid not in old_pages or not os.path.exists(page_path):
+            content = _render_test_page(
+                result, fixture_attachments.get(uuid, []), attempts[result["history_id"]],
+            )
+            if _write_if_changed(page_path, content):
+                stats["pages_written"] += 1
+
+    for uuid in old_pages - set(results):
+        try:
+            os.remove(os.path.join(tests_root, f"{uuid}.html"))
+        except OSError:
+            pass
+
+    if _write_if_changed(os.path.join(report_dir, "index.html"), _render_index(list(latest.values()), attempts)):
+        stats["pages_written"] += 1
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "files": files,
+        "attachments": attachments,
+        "pages": sorted(results),
+    }
+    _write_text_atomic(os.path.join(report_dir, MANIFEST_NAME), json.dumps(manifest))
+
+    stats["tests"] = len(latest)
+    return stats
+
+
+def benchmark(results_dirs, repeat: int = 3) -> dict:
+    """
+    Time the Python generator (clean and incremental/no-change runs) and, if it's on PATH,
+    the `allure generate --clean` CLI on the same results. Returns best-of-`repeat` seconds.
+    Reports are generated into temporary directories, existing reports are left untouched.
+    """
+    if isinstance(results_dirs, str):
+        results_dirs = [results_dirs]
+
+    def _best_of(fn) -> float:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    python_report_dir = tempfile.mkdtemp(prefix="allure-python-benchmark-")
+    try:
+        timings = {
+            "python (clean)": _best_of(lambda: generate_report(results_dirs, python_report_dir, clean=True)),
+            "python (incremental, no changes)": _best_of(lambda: generate_report(results_dirs, python_report_dir)),
+        }
+    finally:
+        shutil.rmtree(python_report_dir, ignore_errors=True)
+
+    allure_cmd = shutil.which("allure")
+    if allure_cmd:
+        cli_report_dir = tempfile.mkdtemp(prefix="allure-cli-benchmark-")
+        try:
+            timings["allure CLI (--clean)"] = _best_of(lambda: subprocess.run(
+                [allure_cmd, "generate", *results_dirs, "-o", cli_report_dir, "--clean"],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            ))
+        finally:
+            shutil.rmtree(cli_report_dir, ignore_errors=True)
+    else:
+        print("'allure' CLI not found in PATH; benchmarking the Python generator only.")
+
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate an HTML report from Allure raw results.")
+    parser.add_argument("results_dirs", nargs="+", help="Allure raw-results directories")
+    parser.add_argument("-o", "--output", default="artifacts/allure-report", help="Report directory")
+    parser.add_argument("--clean", action="store_true", help="Rebuild the report from scratch")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare generation time with the allure CLI (uses temporary report directories)")
+    parser.add_argument("--repeat", type=int, default=3, help="Benchmark repetitions (best-of)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        for label, seconds in benchmark(args.results_dirs, repeat=args.repeat).items():
+            print(f"{label:<36} {seconds * 1000:10.1f} ms")
+        return 0
+
+    stats = generate_report(args.results_dirs, args.output, clean=args.clean)
+    print(
+        f"Report generated: {args.output}/index.html "
+        f"({stats['tests']} tests; parsed {stats['parsed']}, reused {stats['reused']}, "
+        f"attachments copied {stats['attachments_copied']}, pages written {stats['pages_written']})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
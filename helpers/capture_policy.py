@@ -0,0 +1,126 @@
+"""
+Adaptive artifact capture policy for the `page` fixture.
+
+Each test gets one of three capture levels:
+  - "none":  no video, no tracing
+  - "trace": lightweight tracing (DOM snapshots only, no screenshots/sources), no video
+  - "full":  full tracing (screenshots + snapshots + sources) and video recording
+
+The level is chosen from (in priority order) the `capture` marker, the run attempt
+(re-runs always get "full"), and a locally stored pass/fail history per nodeid:
+tests that failed recently (newly failing or flaky) are escalated to "full", tests
+without enough history get "trace", and tests that kept passing get "none".
+
+The history also keeps an average capture cost per level, used to estimate the overhead avoided:
+bytes written, and seconds spent in the `page` fixture starting/stopping traces and waiting for the
+video file to be finalized (closing the browser context is not counted). Recording overhead while the test body runs is not part of the time sample, so the
+time saving is a lower bound.
+"""
+import os
+
+from helpers.local_cache import load_json, save_json
+
+CAPTURE_NONE = "none"
+CAPTURE_TRACE = "trace"
+CAPTURE_FULL = "full"
+CAPTURE_LEVELS = (CAPTURE_NONE, CAPTURE_TRACE, CAPTURE_FULL)
+
+HISTORY_VERSION = 1
+# Number of most recent outcomes kept per test
+HISTORY_WINDOW = 10
+# Cap for the running-average sample count, so the cost averages follow recent runs
+COST_SAMPLES_CAP = 100
+
+
+def load_history(path: str) -> dict:
+    history = load_json(path, None)
+    if not isinstance(history, dict) or history.get("version") != HISTORY_VERSION:
+        history = {"version": HISTORY_VERSION, "tests": {}, "costs": {}}
+    return history
+
+
+def save_history(path: str, history: dict):
+    save_json(path, history)
+
+
+def record_outcome(history: dict, nodeid: str, passed: bool):
+    """Append an outcome ("P"/"F") to the test's history, keeping the last HISTORY_WINDOW ones."""
+    outcomes = history["tests"].get(nodeid, "") + ("P" if passed else "F")
+    history["tests"][nodeid] = outcomes[-HISTORY_WINDOW:]
+
+
+def record_cost(history: dict, level: str, seconds: float, size_bytes: int):
+    """Fold one capture measurement into the running averages of its level."""
+    cost = history["costs"].setdefault(level, {"count": 0, "seconds": 0.0, "bytes": 0.0})
+    count = min(cost["count"], COST_SAMPLES_CAP - 1) + 1
+    cost["seconds"] += (seconds - cost["seconds"]) / count
+    cost["bytes"] += (size_bytes - cost["bytes"]) / count
+    cost["count"] = count
+
+
+def choose_capture_level(nodeid: str, history: dict, run_attempt: int, policy: str = "adaptive",
+                         marker_level: str = None, stable_runs: int = 3, minimum_level: str = CAPTURE_NONE):
+    """
+    Return (level, reason) for the test `nodeid`.
+
+    `policy` is either "adaptive" or one of CAPTURE_LEVELS to force a fixed level for every test.
+    `minimum_level` is a floor applied to the adaptive decision (e.g. "full" when KEEP_VIDEOS is set).
+    """
+    if marker_level in CAPTURE_LEVELS:
+        return marker_level, "marker"
+    if policy in CAPTURE_LEVELS:
+        return policy, "policy"
+
+    outcomes = history["tests"].get(nodeid, "")
+    if run_attempt > 1:
+        level, reason = CAPTURE_FULL, f"attempt {run_attempt}"
+    elif outcomes.endswith("F"):
+        level, reason = CAPTURE_FULL, "failed last run"
+    elif "F" in outcomes[-stable_runs:]:
+        level, reason = CAPTURE_FULL, "flaky"
+    elif len(outcomes) < stable_runs:
+        level, reason = CAPTURE_TRACE, "not enough history"
+    else:
+        level, reason = CAPTURE_NONE, "stable"
+
+    if CAPTURE_LEVELS.index(level) < CAPTURE_LEVELS.index(minimum_level):
+        return minimum_level, "minimum level"
+    return level, reason
+
+
+def trace_options(level: str, screenshots: bool = True, snapshots: bool = True):
+    """Playwright `context.tracing.start()` kwargs for `level`, or None when tracing is off."""
+    if level == CAPTURE_FULL:
+        return {"screenshots": bool(screenshots), "snapshots": bool(snapshots), "sources": True}
+    if level == CAPTURE_TRACE:
+        return {"screenshots": False, "snapshots": bool(snapshots), "sources": False}
+    return None
+
+
+def file_size(path) -> int:
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def summarize_savings(history: dict, level_counts: dict):
+    """
+    Estimate the capture overhead avoided versus capturing every test at "full".
+    Returns (seconds, bytes), or None while there is no "full" cost sample to compare against.
+    Seconds only cover the measured trace start/stop and video finalization (a lower bound).
+    """
+    costs = history.get("costs", {})
+    full = costs.get(CAPTURE_FULL)
+    if not full or not full.get("count"):
+        return None
+
+    saved_seconds = 0.0
+    saved_bytes = 0.0
+    for level, count in level_counts.items():
+        if level == CAPTURE_FULL:
+            continue
+        cost = costs.get(level) or {"seconds": 0.0, "bytes": 0.0}
+        saved_seconds += count * max(full["seconds"] - cost["seconds"], 0.0)
+        saved_bytes += count * max(full["bytes"] - cost["bytes"], 0.0)
+    return saved_seconds, saved_bytes
@@ -0,0 +1,347 @@
+"""
+Test-impact selection based on page-object usage.
+
+Record mode (`--impact-record`) wraps every method of the classes in the `pages` package
+(including properties, static and class methods) and records, per test, which page-object methods it called, e.g.
+``pages/inventory_page.py::InventoryPage.add_product_to_cart``, and which data files it read
+through `record_file_usage` (e.g. visual baselines ``tests/snapshots/inventory_list-chromium-linux.png``).
+The map is stored locally in TAF_CACHE_DIR/impact_map.json.
+
+Selection mode (`--impact-base=<git ref>`) diffs the working tree against the ref and keeps only:
+  - tests that used a changed page-object method (or any method of a class / module changed
+    outside of a method body) or a changed recorded data file,
+  - tests defined in changed test files (tests/**/test_*.py, tests/**/*_test.py),
+  - tests missing from the map (e.g. new tests).
+A changed page-object member no recorded test used (e.g. a new method) selects every user of its class.
+Changes to conftest.py, configs, requirements, pytest.ini, any other framework Python file
+(helpers/, model/, shared modules under tests/, ...), a page module no recorded test uses (e.g. pages/__init__.py) or any other
+file that might be test data fall back to a full run, as does a missing map or a failing `git diff`.
+Only documentation / editor / CI files (IGNORED_*) are ignored.
+"""
+import ast
+import functools
+import importlib
+import inspect
+import os
+import pkgutil
+import re
+import subprocess
+
+from helpers.local_cache import load_json, save_json
+
+MAP_VERSION = 1
+
+# Directories (relative to rootdir, posix style) with special meaning for selection
+PAGES_DIR = "pages/"
+TESTS_DIR = "tests/"
+
+# Files/directories whose change always triggers a full run
+FULL_RUN_FILES = ("conftest.py", "pytest.ini", "requirements.txt")
+FULL_RUN_DIRS = ("configs/",)
+
+# Files that can't affect test results; everything else that is not mapped triggers a full run
+IGNORED_DIRS = (".github/", ".vscode/", "docs/")
+IGNORED_FILES = (".gitignore", ".env.example", "LICENSE")
+IGNORED_SUFFIXES = (".md",)
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Page-object symbols used by the currently running test (record mode)
+_used_symbols = set()
+# Set by instrument_page_objects(); file usage is only recorded while recording
+_rootdir = None
+
+
+# ----------------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------------
+def _to_posix(path: str) -> str:
+    return path.replace(os.sep, "/")
+
+
+def _recording_wrapper(symbol: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _used_symbols.add(symbol)
+        return func(*args, **kwargs)
+
+    wrapper._impact_symbol = symbol
+    return wrapper
+
+
+def _wrap_member(symbol: str, attr):
+    """Return the recording version of a class member, or None if it is not a (new) method."""
+    def _wrap(func):
+        if func is None or hasattr(func, "_impact_symbol"):
+            return func
+        return _recording_wrapper(symbol, func)
+
+    if inspect.isfunction(attr):
+        wrapped = _wrap(attr)
+    elif isinstance(attr, property):
+        wrapped = property(_wrap(attr.fget), _wrap(attr.fset), _wrap(attr.fdel), attr.__doc__)
+        if (wrapped.fget, wrapped.fset, wrapped.fdel) == (attr.fget, attr.fset, attr.fdel):
+            return None
+        return wrapped
+    elif isinstance(attr, (staticmethod, classmethod)):
+        func = _wrap(attr.__func__)
+        wrapped = attr if func is attr.__func__ else type(attr)(func)
+    else:
+        return None
+    return None if wrapped is attr else wrapped
+
+
+def instrument_page_objects(rootdir: str, package: str = "pages") -> int:
+    """
+    Wrap all methods of the classes defined in `package` so calls are recorded.
+    Returns the number of wrapped methods.
+    """
+    global _rootdir
+    _rootdir = rootdir
+    wrapped = 0
+    pkg = importlib.import_module(package)
+    for module_info in pkgutil.iter_modules(pkg.__path__):
+        module = importlib.import_module(f"{package}.{module_info.name}")
+        rel_path = _to_posix(os.path.relpath(module.__file__, rootdir))
+        for cls in vars(module).values():
+            if not inspect.isclass(cls) or cls.__module__ != module.__name__:
+                continue
+            for name, attr in list(vars(cls).items()):
+                member = _wrap_member(f"{rel_path}::{cls.__name__}.{name}", attr)
+                if member is None:
+                    continue
+                setattr(cls, name, member)
+                wrapped += 1
+    return wrapped
+
+
+def record_file_usage(path: str):
+    """Record that the running test depends on the data file `path` (no-op unless recording)."""
+    if _rootdir is not None:
+        _used_symbols.add(_to_posix(os.path.relpath(os.path.abspath(path), _rootdir)))
+
+
+def reset_used_symbols():
+    _used_symbols.clear()
+
+
+def used_symbols() -> list:
+    return sorted(_used_symbols)
+
+
+def load_map(path: str) -> dict:
+    impact_map = load_json(path, None)
+    if not isinstance(impact_map, dict) or impact_map.get("version") != MAP_VERSION:
+        impact_map = {"version": MAP_VERSION, "tests": {}}
+    return impact_map
+
+
+def save_map(path: str, impact_map: dict):
+    save_json(path, impact_map)
+
+
+def record_test(impact_map: dict, nodeid: str, symbols: list, complete: bool):
+    """
+    Store the symbols used by `nodeid`. An incomplete run (e.g. a failed test that stopped
+    half-way) is merged with the previously recorded symbols instead of replacing them.
+    """
+    if not complete:
+        symbols = set(symbols) | set(impact_map["tests"].get(nodeid, []))
+    impact_map["tests"][nodeid] = sorted(symbols)
+
+
+# ----------------------------------------------------------------------------
+# Diff analysis
+# ----------------------------------------------------------------------------
+def _git(args: list, cwd: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+def _unquote_path(path: str) -> str:
+    """Undo git's C-style quoting of paths with special or non-ASCII characters ("a/h\\303\\251.py")."""
+    if path.startswith('"'):
+        return ast.literal_eval("b" + path).decode("utf-8")
+    return path
+
+
+def get_changes(base_ref: str, rootdir: str) -> dict:
+    """
+    Return {path: {"old": [(start, end)], "new": [(start, end)], "whole": bool}} for all files
+    that differ between `base_ref` and the working tree (including untracked files).
+    Paths are relative to `rootdir` in posix style. Raises CalledProcessError if git fails.
+    """
+    toplevel = _git(["rev-parse", "--show-toplevel"], rootdir).strip()
+
+    def _rel(git_path: str) -> str:
+        return _to_posix(os.path.relpath(os.path.join(toplevel, git_path), rootdir))
+
+    def _diff_path(value: str):
+        # "a/<path>" / "b/<path>" (prefixes forced below), quoted when special; a trailing tab follows paths
+        # with spaces
+        value = value.rstrip("\t")
+        return None if value == "/dev/null" else _unquote_path(value)[2:]
+
+    changes = {}
+    current = None
+    old_path = None
+    diff = _git(
+        ["diff", "-U0", "--no-color", "--no-renames", "--no-ext-diff", "--src-prefix=a/", "--dst-prefix=b/",
+         base_ref, "--"],
+        rootdir,
+    )
+    for line in diff.splitlines():
+        if line.startswith("--- "):
+            old_path = _diff_path(line[4:])
+        elif line.startswith("+++ "):
+            new_path = _diff_path(line[4:])
+            deleted = new_path is None
+            path = _rel(old_path if deleted else new_path)
+            current = changes.setdefault(path, {"old": [], "new": [], "whole": False})
+            current["whole"] = current["whole"] or deleted or old_path is None
+        elif current is not None and line.startswith("@@"):
+            match = _HUNK_RE.match(line)
+            if not match:
+                continue
+            old_start, old_count, new_start, new_count = match.groups()
+            old_start, new_start = int(old_start), int(new_start)
+            old_count = 1 if old_count is None else int(old_count)
+            new_count = 1 if new_count is None else int(new_count)
+            if old_count:
+                current["old"].append((old_start, old_start + old_count - 1))
+            if new_count:
+                current["new"].append((new_start, new_start + new_count - 1))
+
+    for git_path in _git(["ls-files", "-z", "--others", "--exclude-standard"], rootdir).split("\0"):
+        if git_path:
+            changes[_rel(git_path)] = {"old": [], "new": [], "whole": True}
+
+    return changes
+
+
+def _symbols_for_ranges(source: str, path: str, ranges: list) -> set:
+    """
+    Map changed line ranges of a page-object module to symbols / symbol prefixes:
+    a method -> "path::Class.method", class body -> "path::Class.", module level -> "path::".
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return {f"{path}::"}
+
+    def _span(node):
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        return start, node.end_lineno
+
+    symbols = set()
+    for start, end in ranges:
+        matched = False
+        for node in tree.body:
+            node_start, node_end = _span(node)
+            if node_end < start or node_start > end:
+                continue
+            matched = True
+            if not isinstance(node, ast.ClassDef):
+                symbols.add(f"{path}::")
+                continue
+            symbol = f"{path}::{node.name}."
+            for child in node.body:
+                if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    continue
+                child_start, child_end = _span(child)
+                if child_start <= start and end <= child_end:
+                    symbol = f"{path}::{node.name}.{child.name}"
+                    break
+            symbols.add(symbol)
+        if not matched:
+            # blank lines / comments between top-level definitions
+            symbols.add(f"{path}::")
+    return symbols
+
+
+def changed_page_symbols(path: str, change: dict, base_ref: str, rootdir: str) -> set:
+    """Symbols touched in a page-object file, looking at both the old and the new version."""
+    if change["whole"]:
+        return {f"{path}::"}
+
+    symbols = set()
+    if change["new"]:
+        with open(os.path.join(rootdir, path), "r", encoding="utf-8") as f:
+            symbols |= _symbols_for_ranges(f.read(), path, change["new"])
+    if change["old"]:
+        try:
+            old_source = _git(["show", f"{base_ref}:./{path}"], rootdir)
+        except subprocess.CalledProcessError:
+            return {f"{path}::"}
+        symbols |= _symbols_for_ranges(old_source, path, change["old"])
+    return symbols
+
+
+# ----------------------------------------------------------------------------
+# Selection
+# ----------------------------------------------------------------------------
+def _is_test_file(path: str) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    return path.startswith(TESTS_DIR) and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def select_tests(nodeids: list, impact_map: dict, changes: dict, base_ref: str, rootdir: str):
+    """
+    Return (selected_nodeids, reason). `selected_nodeids` is None when a full run is required.
+    """
+    if not impact_map["tests"]:
+        return None, "no impact map recorded yet (run with --impact-record)"
+
+    all_used = {symbol for symbols in impact_map["tests"].values() for symbol in symbols}
+
+    changed_symbols = set()
+    changed_test_files = set()
+    for path, change in sorted(changes.items()):
+        name = path.rsplit("/", 1)[-1]
+        if name in FULL_RUN_FILES or path.startswith(FULL_RUN_DIRS):
+            return None, f"{path} changed"
+        if name in IGNORED_FILES or path.startswith(IGNORED_DIRS) or path.endswith(IGNORED_SUFFIXES):
+            continue
+        if not path.endswith(".py"):
+            # data files recorded by record_file_usage (e.g. visual baselines) select their users
+            if path not in all_used:
+                return None, f"{path} changed (possible test data)"
+            changed_symbols.add(path)
+            continue
+        if _is_test_file(path):
+            changed_test_files.add(path)
+        elif path.startswith(PAGES_DIR):
+            # A page module no recorded test uses (e.g. pages/__init__.py, a new helper module) can't
+            # be mapped to tests, so it is not safe to skip anything
+            if not any(symbol.startswith(f"{path}::") for symbol in all_used):
+                return None, f"{path} changed (not used by any recorded test)"
+            changed_symbols |= changed_page_symbols(path, change, base_ref, rootdir)
+        else:
+            return None, f"{path} changed (not a page object or test file)"
+
+    # A changed member no recorded test called directly (e.g. a new method, or one only reached in a way that
+    # was not recorded) may still affect its class' users: widen it to the whole class
+    changed_symbols = {
+        symbol if symbol.endswith(("::", ".")) or "::" not in symbol or symbol in all_used
+        else symbol.rsplit(".", 1)[0] + "."
+        for symbol in changed_symbols
+    }
+
+    def _affected(nodeid: str) -> bool:
+        if nodeid.split("::", 1)[0] in changed_test_files:
+            return True
+        used = impact_map["tests"].get(nodeid)
+        if used is None:
+            return True
+        for symbol in changed_symbols:
+            if symbol.endswith(("::", ".")):
+                if any(u.startswith(symbol) for u in used):
+                    return True
+            elif symbol in used:
+                return True
+        return False
+
+    selected = [nodeid for nodeid in nodeids if _affected(nodeid)]
+    reason = f"{len(changes)} changed files, {len(changed_symbols)} changed page-object symbols / data files"
+    return selected, reason
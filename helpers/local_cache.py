@@ -0,0 +1,26 @@
+"""
+Tiny JSON store for data the framework keeps between runs (test history, durations, ...).
+
+Files live in TAF_CACHE_DIR (default `.taf_cache/`, not committed). Writes are atomic,
+so an interrupted run never leaves a half-written file behind.
+"""
+import json
+import os
+
+
+def load_json(path: str, default):
+    """Return the JSON content of `path`, or `default` if it's missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path: str, data):
+    """Atomically write `data` as JSON to `path` (parent directories are created)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,225 @@
+"""
+Deterministic, duration-balanced sharding of the test suite across CI machines.
+
+`--shard=i/n` keeps only the tests assigned to shard `i` (1-based) of `n`. The plan is built
+from the collected nodeids and the durations recorded by previous runs
+(TAF_CACHE_DIR/durations.json) using bounded-load rendezvous hashing:
+
+  - every test ranks the shards by a stable hash of (nodeid, shard), so a test always prefers
+    the same shard regardless of which other tests exist;
+  - tests are placed longest first on their most preferred shard that still has room
+    (capacity = average shard load + SHARD_SLACK), otherwise on the least loaded shard.
+
+Adding or removing a test therefore moves only about one other test between shards on average
+(when the changed load pushes a shard over capacity), which keeps per-machine caches warm. All shards must see the same nodeids and durations file, so a sharded
+run never updates the shared durations file: each shard writes its measurements to its own file
+(SHARD_DURATIONS_DIR/shard_i_of_n.json) and `merge --durations` folds them into the shared file once
+all shards are done. `plan_fingerprint` identifies the plan inputs, so diverging shards can be spotted.
+
+Merging shard (or attempt) outputs into one Allure results directory hard-links the files
+instead of copying them:
+    python -m helpers.sharding merge artifacts/allure-results/attempt_1 -o artifacts/allure-results/merged
+    python -m helpers.sharding merge --durations artifacts/durations            # fold shard durations only
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+from helpers.local_cache import load_json, save_json
+
+DURATIONS_VERSION = 1
+# Extra room per shard (fraction of the average shard load) before a test spills to another shard
+SHARD_SLACK = 0.1
+# Weight of the latest measurement in the stored duration (exponential moving average)
+DURATION_SMOOTHING = 0.5
+# Duration assumed for tests that were never timed, when nothing is known at all
+DEFAULT_DURATION = 1.0
+
+
+def parse_shard(value: str):
+    """Parse "i/n" into (i, n) with 1 <= i <= n. Raises ValueError for malformed values."""
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"invalid shard '{value}', expected 'i/n' (e.g. 1/4)")
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"invalid shard '{value}', expected 1 <= i <= n")
+    return index, total
+
+
+def shard_namespace(index: int, total: int) -> str:
+    """Directory name used to keep a shard's results/artifacts apart, e.g. 'shard_2_of_4'."""
+    return f"shard_{index}_of_{total}"
+
+
+def load_durations(path: str) -> dict:
+    durations = load_json(path, None)
+    if not isinstance(durations, dict) or durations.get("version") != DURATIONS_VERSION:
+        durations = {"version": DURATIONS_VERSION, "tests": {}}
+    return durations
+
+
+def save_durations(path: str, durations: dict):
+    save_json(path, durations)
+
+
+def record_durations(durations: dict, measured: dict):
+    """Fold this run's per-test durations (setup + call + teardown) into the stored ones."""
+    tests = durations["tests"]
+    for nodeid, seconds in measured.items():
+        previous = tests.get(nodeid)
+        if previous is None:
+            tests[nodeid] = round(seconds, 3)
+        else:
+            tests[nodeid] = round(previous + (seconds - previous) * DURATION_SMOOTHING, 3)
+
+
+def save_shard_durations(path: str, measured: dict):
+    """Store this shard's measurements (a re-run attempt of the same shard updates its tests)."""
+    durations = load_durations(path)
+    durations["tests"].update({nodeid: round(seconds, 3) for nodeid, seconds in measured.items()})
+    save_durations(path, durations)
+
+
+def _json_files(paths: list) -> list:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(".json"))
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+def merge_durations(shard_paths: list, durations_path: str) -> int:
+    """
+    Fold per-shard duration files (or directories of them) into the shared durations file.
+    Returns the number of test durations folded in.
+    """
+    durations = load_durations(durations_path)
+    folded = 0
+    for path in _json_files(shard_paths):
+        measured = load_durations(path)["tests"]
+        record_durations(durations, measured)
+        folded += len(measured)
+    save_durations(durations_path, durations)
+    return folded
+
+
+def _fingerprint(data) -> str:
+    return hashlib.blake2b(json.dumps(data).encode("utf-8"), digest_size=6).hexdigest()
+
+
+def durations_fingerprint(durations: dict) -> str:
+    """Short hash of the durations file content (known before collection, e.g. for the report header)."""
+    return _fingerprint(sorted(durations["tests"].items()))
+
+
+def plan_fingerprint(nodeids: list, durations: dict, total: int) -> str:
+    """Short hash of everything the plan depends on: shards with different fingerprints disagree."""
+    ordered = sorted(nodeids)
+    return _fingerprint([ordered, [durations["tests"].get(n) for n in ordered], total])
+
+
+def _rank(nodeid: str, shard: int) -> int:
+    digest = hashlib.blake2b(f"{shard}:{nodeid}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def build_plan(nodeids: list, durations: dict, total: int) -> dict:
+    """Return {nodeid: shard index (1-based)} for all `nodeids`."""
+    known = sorted(durations["tests"][n] for n in nodeids if n in durations["tests"])
+    fallback = known[len(known) // 2] if known else DEFAULT_DURATION
+    weights = {nodeid: durations["tests"].get(nodeid, fallback) for nodeid in nodeids}
+
+    capacity = sum(weights.values()) / total * (1 + SHARD_SLACK)
+    capacity = max(capacity, max(weights.values(), default=0.0))
+
+    loads = {shard: 0.0 for shard in range(1, total + 1)}
+    plan = {}
+    for nodeid in sorted(nodeids, key=lambda n: (-weights[n], n)):
+        preferences = sorted(loads, key=lambda shard: _rank(nodeid, shard), reverse=True)
+        target = next(
+            (shard for shard in preferences if loads[shard] + weights[nodeid] <= capacity),
+            min(preferences, key=lambda shard: (loads[shard], shard)),
+        )
+        loads[target] += weights[nodeid]
+        plan[nodeid] = target
+    return plan
+
+
+def estimated_load(plan: dict, durations: dict, shard: int) -> float:
+    return sum(durations["tests"].get(nodeid, 0.0) for nodeid, s in plan.items() if s == shard)
+
+
+def merge_results(source_dirs: list, dest_dir: str) -> dict:
+    """
+    Merge Allure results (including shard sub-directories) from `source_dirs` into `dest_dir`.
+    Files are hard-linked (no data copied) and only copied when linking is not possible
+    (e.g. across filesystems). Later sources win on name clashes. Returns counters.
+    """
+    stats = {"linked": 0, "copied": 0, "skipped": 0}
+    os.makedirs(dest_dir, exist_ok=True)
+    dest_abs = os.path.abspath(dest_dir)
+
+    for source_dir in source_dirs:
+        for root, dirs, files in os.walk(source_dir):
+            # never descend into the destination (e.g. merging 'results/*' into 'results/merged')
+            dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != dest_abs)
+            for name in sorted(files):
+                src_path = os.path.join(root, name)
+                dest_path = os.path.join(dest_dir, name)
+                if os.path.exists(dest_path):
+                    if os.path.samefile(src_path, dest_path):
+                        stats["skipped"] += 1
+                        continue
+                    os.remove(dest_path)
+                try:
+                    os.link(src_path, dest_path)
+                    stats["linked"] += 1
+                except OSError:
+                    shutil.copy2(src_path, dest_path)
+                    stats["copied"] += 1
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shard helpers for the pytest suite.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    merge = subparsers.add_parser(
+        "merge", help="Merge shard/attempt Allure results into one directory and/or fold shard durations",
+    )
+    merge.add_argument("sources", nargs="*", help="Allure results directories (shard sub-directories included)")
+    merge.add_argument("-o", "--output", help="Merged results directory (required with sources)")
+    merge.add_argument("--durations", nargs="+", default=[], metavar="PATH",
+                       help="Per-shard duration files or directories (e.g. artifacts/durations) to fold in")
+    merge.add_argument(
+        "--durations-file",
+        default=os.getenv("SHARD_DURATIONS_FILE", os.path.join(os.getenv("TAF_CACHE_DIR", ".taf_cache"), "durations.json")),
+        help="Shared durations file to update (default: SHARD_DURATIONS_FILE or .taf_cache/durations.json)",
+    )
+    args = parser.parse_args(argv)
+    if args.sources and not args.output:
+        parser.error("-o/--output is required when merging results directories")
+    if not args.sources and not args.durations:
+        parser.error("nothing to merge: give results directories and/or --durations")
+
+    if args.sources:
+        sources = [source for source in args.sources if os.path.isdir(source)]
+        stats = merge_results(sources, args.output)
+        print(
+            f"Merged {len(sources)} result directories into {args.output} "
+            f"(linked {stats['linked']}, copied {stats['copied']}, already present {stats['skipped']})"
+        )
+    if args.durations:
+        folded = merge_durations(args.durations, args.durations_file)
+        print(f"Folded {folded} shard test durations into {args.durations_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+"""
+Pool of test accounts (`model.user.User`) leased to pytest-xdist workers.
+
+Accounts come from SAUCE_USERS (comma-separated "username" or "username:password" entries;
+entries without a password use SAUCE_PASSWORD) and/or SAUCE_USERS_FILE (one entry per line,
+'#' comments allowed, or a JSON list of {"username": ..., "password": ...} objects).
+
+Each account has a lock file in USER_LEASE_DIR. A worker leases an account by taking an exclusive,
+non-blocking OS file lock on it, so no two workers on the machine use the same account at once.
+The OS drops the lock when the process exits, so leases of crashed workers are released
+automatically (no stale lock files to clean up).
+"""
+import json
+import os
+import re
+import time
+
+from model.user import User
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _make_user(username, password, default_password: str, entry) -> User:
+    username = username.strip() if isinstance(username, str) else ""
+    password = password or default_password
+    if not username:
+        raise RuntimeError(f"User pool entry {entry!r} has no username.")
+    if not password:
+        raise RuntimeError(
+            f"User pool entry '{username}' has no password: use 'username:password' "
+            '(or "password" in JSON) or set SAUCE_PASSWORD.'
+        )
+    return User(username=username, password=password)
+
+
+def _parse_entry(entry: str, default_password: str):
+    entry = entry.strip()
+    if not entry or entry.startswith("#"):
+        return None
+    username, _, password = entry.partition(":")
+    return _make_user(username, password, default_password, entry)
+
+
+def load_users(users: str = None, users_file: str = None, default_password: str = None) -> list:
+    """Return the pool of users from the SAUCE_USERS value and/or SAUCE_USERS_FILE (duplicates removed)."""
+    pool = []
+    for entry in re.split(r"[,\n]", users or ""):
+        user = _parse_entry(entry, default_password)
+        if user:
+            pool.append(user)
+
+    if users_file:
+        with open(users_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        if users_file.endswith(".json"):
+            for item in json.loads(content):
+                if not isinstance(item, dict):
+                    raise RuntimeError(f"User pool entry {item!r} in {users_file} is not an object.")
+                pool.append(_make_user(item.get("username"), item.get("password"), default_password, item))
+        else:
+            for line in content.splitlines():
+                user = _parse_entry(line, default_password)
+                if user:
+                    pool.append(user)
+
+    unique = {}
+    for user in pool:
+        unique.setdefault(user.username, user)
+    return list(unique.values())
+
+
+def _try_lock(fd) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            # locks the first byte (the file may be empty); the position must stay at 0 for unlocking
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    if fcntl is None:
+        # Windows releases byte-range locks of a closed handle only eventually: unlock explicitly
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class UserLease:
+    """An account leased by this process; the lock is held until `release()` (or process exit)."""
+
+    def __init__(self, user: User, fd: int, wait_seconds: float):
+        self.user = user
+        self.wait_seconds = wait_seconds
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            _unlock(self._fd)
+        finally:
+            os.close(self._fd)  # closing the descriptor drops the lock
+            self._fd = None
+
+
+def lease_user(users: list, lock_dir: str, timeout: float, owner: str = "", preferred: int = 0,
+               poll_interval: float = 0.2) -> UserLease:
+    """
+    Lease a free account from `users`, waiting up to `timeout` seconds for one to become free.
+    Accounts are tried starting at index `preferred` (e.g. the xdist worker number) to avoid contention.
+    """
+    if not users:
+        raise RuntimeError("The user pool is empty.")
+    os.makedirs(lock_dir, exist_ok=True)
+
+    start = time.monotonic()
+    order = [users[(preferred + i) % len(users)] for i in range(len(users))]
+    while True:
+        for user in order:
+            lock_name = re.sub(r"[^0-9A-Za-z._-]+", "_", user.username) + ".lock"
+            fd = os.open(os.path.join(lock_dir, lock_name), os.O_RDWR | os.O_CREAT, 0o644)
+            if not _try_lock(fd):
+                os.close(fd)
+                continue
+            if fcntl is not None:
+                # informational only: who holds the lease (POSIX only: on Windows the locked byte
+                # can't be truncated or overwritten safely)
+                os.ftruncate(fd, 0)
+                os.write(fd, f"{owner} pid={os.getpid()}\n".encode("utf-8"))
+            return UserLease(user, fd, time.monotonic() - start)
+
+        waited = time.monotonic() - start
+        if waited >= timeout:
+            raise RuntimeError(
+                f"No free account in the user pool after {waited:.0f}s (pool size {len(users)}). "
+                "Add accounts to SAUCE_USERS / SAUCE_USERS_FILE or run with fewer workers."
+            )
+        time.sleep(poll_interval)
@@ -0,0 +1,250 @@
+"""
+Visual snapshot comparison for page states (used by `pages.base_page.BasePage.assert_snapshot`).
+
+A screenshot of a page or element is compared against a stored baseline PNG:
+  1. fast pre-check: identical PNG bytes, or identical pixels after masking (BLAKE2 digest),
+     skip the full diff entirely;
+  2. full comparison, vectorized with NumPy:
+       - "pixel": a pixel differs when any channel differs by more than `threshold` (0..1);
+                  the snapshot matches when the share of differing pixels <= `max_diff_ratio`;
+       - "phash": the 64-bit difference hashes (dHash) of both images are compared and the
+                  snapshot matches when their Hamming distance <= `max_hash_distance`.
+Masked regions (Playwright locators, or (x, y, width, height) rectangles in screenshot pixels)
+are ignored. Actual/expected/diff images are written (and attached to Allure) only on failure, under
+the output namespace (attempt / shard / worker, see `set_output_namespace`) and named after the test.
+With `update=True` the screenshot is stored as the new baseline instead of being compared.
+
+Requires numpy and Pillow (see requirements.txt).
+"""
+import hashlib
+import io
+import os
+import re
+import shutil
+import sys
+from dataclasses import dataclass
+
+from helpers import impact
+
+try:
+    import numpy as np
+    from PIL import Image
+except Exception:
+    # numpy / Pillow not installed: visual snapshots are unavailable, everything else keeps working
+    np = None
+    Image = None
+
+COMPARE_METHODS = ("pixel", "phash")
+HASH_SIZE = 8
+
+# ITU-R BT.601 luma weights used for the greyscale conversion
+_LUMA = (0.299, 0.587, 0.114)
+
+# Sub-directory of `diff_dir` for this process, e.g. "attempt_2/shard_1_of_4/gw3" (set by conftest)
+_output_namespace = ""
+
+
+@dataclass
+class SnapshotResult:
+    matched: bool
+    reason: str
+    diff_ratio: float = 0.0
+    hash_distance: int = 0
+    diff_mask: object = None  # boolean (H, W) array of differing pixels, only for failed pixel diffs
+
+
+def _require_dependencies():
+    if np is None or Image is None:
+        raise RuntimeError(
+            "Visual snapshots require numpy and Pillow. Install them with: pip install -r requirements.txt"
+        )
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^0-9A-Za-z._-]+", "_", name)
+
+
+def set_output_namespace(namespace: str):
+    """Keep failure images of different attempts / shards / xdist workers apart."""
+    global _output_namespace
+    _output_namespace = namespace
+
+
+def _failure_prefix(diff_dir: str, name: str) -> str:
+    """Path prefix of the failure images: <diff_dir>/<namespace>/<test nodeid>__<snapshot name>."""
+    # PYTEST_CURRENT_TEST is "<nodeid> (<phase>)"
+    nodeid = os.getenv("PYTEST_CURRENT_TEST", "").rsplit(" (", 1)[0]
+    file_name = _safe_name(name) if not nodeid else f"{_safe_name(nodeid.replace('::', '__'))}__{_safe_name(name)}"
+    return os.path.join(diff_dir, _output_namespace, file_name)
+
+
+def baseline_path(baseline_dir: str, name: str, browser: str) -> str:
+    """Baselines are kept per browser and platform, since font rendering differs between them."""
+    return os.path.join(baseline_dir, f"{_safe_name(name)}-{browser}-{sys.platform}.png")
+
+
+def decode_png(data: bytes):
+    """Decode PNG bytes into an RGBA uint8 array of shape (H, W, 4)."""
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert("RGBA"))
+
+
+def apply_masks(image, rects) -> "np.ndarray":
+    """Return a copy of `image` with the (x, y, width, height) rectangles blacked out."""
+    if not rects:
+        return image
+    masked = image.copy()
+    height, width = masked.shape[:2]
+    for x, y, w, h in rects:
+        x0, y0 = max(int(x), 0), max(int(y), 0)
+        x1, y1 = min(int(x + w), width), min(int(y + h), height)
+        if x0 < x1 and y0 < y1:
+            masked[y0:y1, x0:x1] = 0
+    return masked
+
+
+def _digest(image) -> bytes:
+    return hashlib.blake2b(np.ascontiguousarray(image).tobytes(), digest_size=16).digest()
+
+
+def difference_hash(image, hash_size: int = HASH_SIZE) -> int:
+    """64-bit dHash: compares horizontally adjacent pixels of a (hash_size+1 x hash_size) greyscale thumbnail."""
+    grey = (image[..., :3].astype(np.float32) @ np.asarray(_LUMA, dtype=np.float32)).astype(np.uint8)
+    thumb = np.asarray(Image.fromarray(grey).resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def compare_images(actual, expected, method: str = "pixel", threshold: float = 0.1,
+                   max_diff_ratio: float = 0.0, max_hash_distance: int = 0) -> SnapshotResult:
+    """Compare two RGBA arrays (masks already applied)."""
+    if method not in COMPARE_METHODS:
+        raise ValueError(f"unknown comparison method '{method}', expected one of {COMPARE_METHODS}")
+
+    if actual.shape != expected.shape:
+        return SnapshotResult(False, f"size differs: actual {actual.shape[1]}x{actual.shape[0]}, "
+                                     f"expected {expected.shape[1]}x{expected.shape[0]}", diff_ratio=1.0)
+
+    # Fast pre-check: identical pixels -> no need for the full diff
+    if _digest(actual) == _digest(expected):
+        return SnapshotResult(True, "identical")
+
+    if method == "phash":
+        distance = (difference_hash(actual) ^ difference_hash(expected)).bit_count()
+        matched = distance <= max_hash_distance
+        return SnapshotResult(matched, f"perceptual hash distance {distance} (allowed {max_hash_distance})",
+                              hash_distance=distance)
+
+    delta = np.abs(actual.astype(np.int16) - expected.astype(np.int16)).max(axis=2)
+    diff_mask = delta > int(threshold * 255)
+    diff_ratio = float(np.count_nonzero(diff_mask)) / diff_mask.size
+    matched = diff_ratio <= max_diff_ratio
+    return SnapshotResult(
+        matched,
+        f"{diff_ratio:.4%} of pixels differ (allowed {max_diff_ratio:.4%}, channel threshold {threshold})",
+        diff_ratio=diff_ratio,
+        diff_mask=None if matched else diff_mask,
+    )
+
+
+def render_diff(expected, diff_mask):
+    """Dimmed greyscale copy of `expected` with differing pixels highlighted in red (RGBA array)."""
+    grey = (expected[..., :3].astype(np.float32) @ np.asarray(_LUMA, dtype=np.float32)) * 0.4 + 153
+    out = np.empty(expected.shape[:2] + (4,), dtype=np.uint8)
+    out[..., :3] = grey.astype(np.uint8)[..., None]
+    out[..., 3] = 255
+    if diff_mask is not None:
+        out[diff_mask] = (255, 0, 0, 255)
+    return out
+
+
+def _save_png(array, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    Image.fromarray(array, "RGBA").save(path)
+
+
+def _attach_to_allure(paths: dict):
+    try:
+        import allure
+        from allure_commons.types import AttachmentType
+    except Exception:
+        return
+    for label, path in paths.items():
+        try:
+            allure.attach.file(path, name=label, attachment_type=AttachmentType.PNG)
+        except Exception:
+            pass
+
+
+def assert_snapshot(target, name: str, baseline_dir: str, diff_dir: str, browser: str = "chromium",
+                    update: bool = False, mask=None, full_page: bool = False, method: str = "pixel",
+                    threshold: float = 0.1, max_diff_ratio: float = 0.0, max_hash_distance: int = 0):
+    """
+    Screenshot `target` (a Playwright Page or Locator) and compare it with the baseline `name`.
+    Raises AssertionError on mismatch or missing baseline (unless `update` is True).
+    """
+    _require_dependencies()
+
+    mask = list(mask or [])
+    rects = [m for m in mask if isinstance(m, (tuple, list))]
+    locators = [m for m in mask if not isinstance(m, (tuple, list))]
+
+    screenshot_args = {"animations": "disabled", "caret": "hide"}
+    if locators:
+        # Playwright paints masked elements with a solid box, so they never cause differences
+        screenshot_args["mask"] = locators
+    if full_page:
+        screenshot_args["full_page"] = True
+    actual_png = target.screenshot(**screenshot_args)
+
+    expected_path = baseline_path(baseline_dir, name, browser)
+    # --impact-record: a change to this baseline selects the test
+    impact.record_file_usage(expected_path)
+    if update:
+        os.makedirs(os.path.dirname(expected_path) or ".", exist_ok=True)
+        with open(expected_path, "wb") as f:
+            f.write(actual_png)
+        return SnapshotResult(True, "baseline updated")
+
+    failure_prefix = _failure_prefix(diff_dir, name)
+    if not os.path.exists(expected_path):
+        os.makedirs(os.path.dirname(failure_prefix), exist_ok=True)
+        with open(f"{failure_prefix}-actual.png", "wb") as f:
+            f.write(actual_png)
+        raise AssertionError(
+            f"Missing visual baseline '{expected_path}' for snapshot '{name}'. "
+            f"Run with VISUAL_UPDATE_BASELINES=true to create it (actual saved to {failure_prefix}-actual.png)."
+        )
+
+    with open(expected_path, "rb") as f:
+        expected_png = f.read()
+
+    # Fast pre-check: byte-identical screenshot, no decoding needed
+    if actual_png == expected_png:
+        return SnapshotResult(True, "identical")
+
+    actual = apply_masks(decode_png(actual_png), rects)
+    expected = apply_masks(decode_png(expected_png), rects)
+    result = compare_images(actual, expected, method=method, threshold=threshold,
+                            max_diff_ratio=max_diff_ratio, max_hash_distance=max_hash_distance)
+    if result.matched:
+        return result
+
+    # Failure only: write actual / expected / diff images for inspection
+    paths = {
+        "actual": f"{failure_prefix}-actual.png",
+        "expected": f"{failure_prefix}-expected.png",
+    }
+    os.makedirs(os.path.dirname(failure_prefix), exist_ok=True)
+    with open(paths["actual"], "wb") as f:
+        f.write(actual_png)
+    shutil.copyfile(expected_path, paths["expected"])
+    if result.diff_mask is not None:
+        paths["diff"] = f"{failure_prefix}-diff.png"
+        _save_png(render_diff(expected, result.diff_mask), paths["diff"])
+    _attach_to_allure(paths)
+
+    raise AssertionError(
+        f"Visual snapshot '{name}' does not match baseline {expected_path}: {result.reason}. "
+        f"See {failure_prefix}-*.png"
+    )
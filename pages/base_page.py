@@ -0,0 +1,41 @@
+from playwright.sync_api import Page
+from configs.config import (
+    BROWSER,
+    VISUAL_BASELINE_DIR,
+    VISUAL_DIFF_DIR,
+    VISUAL_MAX_DIFF_RATIO,
+    VISUAL_THRESHOLD,
+    VISUAL_UPDATE_BASELINES,
+)
+from helpers import visual
+
+
+class BasePage:
+    def __init__(self, page: Page):
+        self.page = page
+
+    # Visual checks
+    def assert_snapshot(self, name: str, locator=None, mask=None, full_page: bool = False,
+                        method: str = "pixel", threshold: float = None, max_diff_ratio: float = None,
+                        max_hash_distance: int = 0):
+        """
+        Compare a screenshot of the page (or of `locator`) with the stored baseline `name`.
+
+        `mask` takes locators and/or (x, y, width, height) rectangles to ignore (e.g. dynamic content).
+        `method` is "pixel" (tolerance: threshold / max_diff_ratio) or "phash" (max_hash_distance).
+        Set VISUAL_UPDATE_BASELINES=true to (re)create the baselines instead of comparing.
+        """
+        return visual.assert_snapshot(
+            locator or self.page,
+            name,
+            baseline_dir=VISUAL_BASELINE_DIR,
+            diff_dir=VISUAL_DIFF_DIR,
+            browser=BROWSER,
+            update=VISUAL_UPDATE_BASELINES,
+            mask=mask,
+            full_page=full_page,
+            method=method,
+            threshold=VISUAL_THRESHOLD if threshold is None else threshold,
+            max_diff_ratio=VISUAL_MAX_DIFF_RATIO if max_diff_ratio is None else max_diff_ratio,
+            max_hash_distance=max_hash_distance,
+        )
@@ -1,10 +1,7 @@
-from playwright.sync_api import Page
+from pages.base_page import BasePage
 
 
-class CartPage:
-    def __init__(self, page: Page):
-        self.page = page
-
+class CartPage(BasePage):
     # Locators
     def _cart_items(self):
         return self.page.locator(".cart_item")
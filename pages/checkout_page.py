@@ -1,10 +1,7 @@
-from playwright.sync_api import Page
+from pages.base_page import BasePage
 
 
-class CheckoutYourInformationPage:
-    def __init__(self, page: Page):
-        self.page = page
-
+class CheckoutYourInformationPage(BasePage):
     def _first_name(self):
         return self.page.locator("[data-test='firstName']")
 
@@ -25,10 +22,7 @@ class CheckoutYourInformationPage:
         self._continue_button().click()
 
 
-class CheckoutOverviewPage:
-    def __init__(self, page: Page):
-        self.page = page
-
+class CheckoutOverviewPage(BasePage):
     def _finish_button(self):
         return self.page.locator("[data-test='finish']")
 
@@ -37,16 +31,20 @@ class CheckoutOverviewPage:
         self._finish_button().click()
 
 
-class CheckoutCompletePage:
-    def __init__(self, page: Page):
-        self.page = page
-
+class CheckoutCompletePage(BasePage):
     def _complete_header(self):
         return self.page.locator(".complete-header")
 
+    def _complete_container(self):
+        return self.page.locator(".checkout_complete_container")
+
     def is_complete(self) -> bool:
         """Return True if the order complete header is visible."""
         try:
             return self._complete_header().is_visible()
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+    def assert_confirmation_snapshot(self, name: str = "checkout_complete", **kwargs):
+        """Compare the order confirmation with its visual baseline (see BasePage.assert_snapshot)."""
+        return self.assert_snapshot(name, locator=self._complete_container(), **kwargs)
@@ -1,10 +1,7 @@
-from playwright.sync_api import Page
+from pages.base_page import BasePage
 
 
-class InventoryPage:
-    def __init__(self, page: Page):
-        self.page = page
-
+class InventoryPage(BasePage):
     # Locator-returning methods (kept private-ish)
     def _inventory_list(self):
         return self.page.locator(".inventory_list")
@@ -39,4 +36,8 @@ class InventoryPage:
         try:
             return self._product_remove_button(product_id).is_visible()
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+    def assert_inventory_snapshot(self, name: str = "inventory_list", **kwargs):
+        """Compare the inventory list with its visual baseline (see BasePage.assert_snapshot)."""
+        return self.assert_snapshot(name, locator=self._inventory_list(), **kwargs)
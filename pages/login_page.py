@@ -1,11 +1,8 @@
-from playwright.sync_api import Page
+from pages.base_page import BasePage
 from configs.config import BASE_URL
 
 
-class LoginPage:
-    def __init__(self, page: Page):
-        self.page = page
-
+class LoginPage(BasePage):
     # Locator-returning methods
     def username_input(self):
         return self.page.locator("input#user-name")
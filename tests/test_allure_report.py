@@ -0,0 +1,190 @@
+import json
+import os
+
+from helpers import allure_report
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def _result(results_dir, uuid, history_id, status="passed", start=1000, attachments=(), message=""):
+    for source in attachments:
+        with open(os.path.join(results_dir, source), "w", encoding="utf-8") as f:
+            f.write(f"content of {source}")
+    _write_json(os.path.join(results_dir, f"{uuid}-result.json"), {
+        "uuid": uuid,
+        "historyId": history_id,
+        "name": history_id,
+        "fullName": f"tests.test_checkout#{history_id}",
+        "status": status,
+        "start": start,
+        "stop": start + 500,
+        "statusDetails": {"message": message},
+        "labels": [{"name": "suite", "value": "test_checkout"}],
+        "attachments": [{"name": source, "source": source, "type": "text/plain"} for source in attachments],
+    })
+
+
+def _container(results_dir, uuid, children, source):
+    with open(os.path.join(results_dir, source), "w", encoding="utf-8") as f:
+        f.write("video")
+    _write_json(os.path.join(results_dir, f"{uuid}-container.json"), {
+        "uuid": uuid,
+        "children": children,
+        "afters": [{"name": "page", "attachments": [{"name": "video", "source": source, "type": "video/webm"}]}],
+    })
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _page(report_dir, uuid):
+    return os.path.join(report_dir, allure_report.TESTS_DIR, f"{uuid}.html")
+
+
+def _results(tmp_path):
+    results_dir = str(tmp_path / "results")
+    os.makedirs(results_dir)
+    _result(results_dir, "login", "test_login", attachments=["login-log.txt"])
+    _result(results_dir, "checkout", "test_checkout")
+    _container(results_dir, "page-fixture", ["checkout"], "checkout-video.webm")
+    return results_dir
+
+
+def test_first_generation_then_nothing_to_do(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+
+    stats = allure_report.generate_report(results_dir, report_dir)
+
+    assert stats == {"parsed": 3, "reused": 0, "attachments_copied": 2, "attachments_removed": 0,
+                     "pages_written": 3, "tests": 2}
+    assert "checkout-video.webm" in _read(_page(report_dir, "checkout"))
+    assert "login-log.txt" in _read(_page(report_dir, "login"))
+
+    stats = allure_report.generate_report(results_dir, report_dir)
+
+    assert stats == {"parsed": 0, "reused": 3, "attachments_copied": 0, "attachments_removed": 0,
+                     "pages_written": 0, "tests": 2}
+
+
+def test_manifest_keys_are_relative(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+    allure_report.generate_report(results_dir, report_dir)
+
+    manifest = json.loads(_read(os.path.join(report_dir, allure_report.MANIFEST_NAME)))
+
+    assert sorted(manifest["files"]) == [
+        os.path.join("..", "results", name)
+        for name in ("checkout-result.json", "login-result.json", "page-fixture-container.json")
+    ]
+    assert str(tmp_path) not in json.dumps(manifest)
+
+
+def test_changed_result_is_reparsed_and_only_its_page_rewritten(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+    allure_report.generate_report(results_dir, report_dir)
+
+    _result(results_dir, "login", "test_login", status="failed", message="login button not found",
+            attachments=["login-log.txt"])
+    stats = allure_report.generate_report(results_dir, report_dir)
+
+    # the login page and the index (status counts) change; the checkout page is kept
+    assert (stats["parsed"], stats["reused"], stats["pages_written"]) == (1, 2, 2)
+    assert "login button not found" in _read(_page(report_dir, "login"))
+
+
+def test_retries_are_grouped_and_regrouped(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+    _result(results_dir, "login-retry", "test_login", status="failed", start=100, message="timeout")
+    allure_report.generate_report(results_dir, report_dir)
+
+    # the latest attempt is in the overview, both attempts link to each other
+    index = _read(os.path.join(report_dir, "index.html"))
+    assert "data/tests/login.html#retries" in index and "login-retry.html" not in index
+    assert "href=\"login-retry.html\"" in _read(_page(report_dir, "login"))
+    assert "href=\"login.html\"" in _read(_page(report_dir, "login-retry"))
+
+    # the earlier attempt disappears: its page is dropped and its sibling loses the Retries section
+    os.remove(os.path.join(results_dir, "login-retry-result.json"))
+    stats = allure_report.generate_report(results_dir, report_dir)
+
+    assert not os.path.exists(_page(report_dir, "login-retry"))
+    assert "id=\"retries\"" not in _read(_page(report_dir, "login"))
+    assert (stats["parsed"], stats["pages_written"]) == (0, 2)  # login page + index
+
+
+def test_new_retry_rerenders_the_earlier_attempt(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+    allure_report.generate_report(results_dir, report_dir)
+
+    _result(results_dir, "login-retry", "test_login", status="passed", start=5000)
+    stats = allure_report.generate_report(results_dir, report_dir)
+
+    assert (stats["parsed"], stats["pages_written"]) == (1, 3)  # both attempts + index
+    assert "href=\"login-retry.html\"" in _read(_page(report_dir, "login"))
+
+
+def test_removed_container_rerenders_its_children_and_drops_the_attachment(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+    allure_report.generate_report(results_dir, report_dir)
+    video = os.path.join(report_dir, allure_report.ATTACHMENTS_DIR, "checkout-video.webm")
+    assert os.path.exists(video)
+
+    os.remove(os.path.join(results_dir, "page-fixture-container.json"))
+    stats = allure_report.generate_report(results_dir, report_dir)
+
+    assert stats["attachments_removed"] == 1
+    assert stats["pages_written"] == 1  # the checkout page; the index does not change
+    assert not os.path.exists(video)
+    assert "checkout-video.webm" not in _read(_page(report_dir, "checkout"))
+
+
+def test_removed_result_drops_page_and_attachments(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+    allure_report.generate_report(results_dir, report_dir)
+
+    os.remove(os.path.join(results_dir, "login-result.json"))
+    stats = allure_report.generate_report(results_dir, report_dir)
+
+    assert stats["tests"] == 1 and stats["attachments_removed"] == 1
+    assert not os.path.exists(_page(report_dir, "login"))
+    assert not os.path.exists(os.path.join(report_dir, allure_report.ATTACHMENTS_DIR, "login-log.txt"))
+    assert "login.html" not in _read(os.path.join(report_dir, "index.html"))
+
+
+def test_missing_page_is_restored_and_clean_rebuilds(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+    allure_report.generate_report(results_dir, report_dir)
+
+    os.remove(_page(report_dir, "login"))
+    stats = allure_report.generate_report(results_dir, report_dir)
+    assert (stats["parsed"], stats["pages_written"]) == (0, 1)
+    assert os.path.exists(_page(report_dir, "login"))
+
+    stats = allure_report.generate_report(results_dir, report_dir, clean=True)
+    assert (stats["parsed"], stats["reused"], stats["attachments_copied"]) == (3, 0, 2)
+
+
+def test_benchmark_leaves_output_untouched(tmp_path):
+    results_dir = _results(tmp_path)
+    report_dir = str(tmp_path / "report")
+    allure_report.generate_report(results_dir, report_dir)
+    before = sorted(os.listdir(report_dir))
+
+    timings = allure_report.benchmark(results_dir, repeat=1)
+
+    assert "python (clean)" in timings
+    assert sorted(os.listdir(report_dir)) == before
@@ -0,0 +1,102 @@
+import pytest
+
+from helpers import capture_policy
+from helpers.capture_policy import CAPTURE_FULL, CAPTURE_NONE, CAPTURE_TRACE
+
+NODEID = "tests/test_checkout.py::test_add_item_and_checkout"
+
+
+def _history(outcomes=None, costs=None):
+    tests = {NODEID: outcomes} if outcomes is not None else {}
+    return {"version": capture_policy.HISTORY_VERSION, "tests": tests, "costs": costs or {}}
+
+
+@pytest.mark.parametrize("outcomes, run_attempt, expected", [
+    ("PPP", 2, (CAPTURE_FULL, "attempt 2")),
+    ("PPF", 1, (CAPTURE_FULL, "failed last run")),
+    ("PPFPP", 1, (CAPTURE_FULL, "flaky")),
+    ("FPPP", 1, (CAPTURE_NONE, "stable")),  # the failure is older than the last stable_runs outcomes
+    ("PP", 1, (CAPTURE_TRACE, "not enough history")),
+    (None, 1, (CAPTURE_TRACE, "not enough history")),
+    ("PPP", 1, (CAPTURE_NONE, "stable")),
+])
+def test_adaptive_decision(outcomes, run_attempt, expected):
+    assert capture_policy.choose_capture_level(NODEID, _history(outcomes), run_attempt) == expected
+
+
+def test_marker_beats_policy_and_policy_beats_history():
+    history = _history("PPF")
+
+    assert capture_policy.choose_capture_level(NODEID, history, 2, policy=CAPTURE_NONE,
+                                               marker_level=CAPTURE_TRACE) == (CAPTURE_TRACE, "marker")
+    assert capture_policy.choose_capture_level(NODEID, history, 2, policy=CAPTURE_NONE) == (CAPTURE_NONE, "policy")
+    # an unknown marker value is ignored
+    assert capture_policy.choose_capture_level(NODEID, history, 1, marker_level="video")[0] == CAPTURE_FULL
+
+
+def test_minimum_level_is_a_floor_for_the_adaptive_decision():
+    stable = _history("PPP")
+
+    assert capture_policy.choose_capture_level(NODEID, stable, 1, minimum_level=CAPTURE_TRACE) == \
+        (CAPTURE_TRACE, "minimum level")
+    assert capture_policy.choose_capture_level(NODEID, stable, 1, minimum_level=CAPTURE_FULL) == \
+        (CAPTURE_FULL, "minimum level")
+    # above the floor the adaptive decision is kept
+    assert capture_policy.choose_capture_level(NODEID, _history("PPF"), 1, minimum_level=CAPTURE_TRACE) == \
+        (CAPTURE_FULL, "failed last run")
+    # marker and policy are not raised by the floor
+    assert capture_policy.choose_capture_level(NODEID, stable, 1, marker_level=CAPTURE_NONE,
+                                               minimum_level=CAPTURE_FULL) == (CAPTURE_NONE, "marker")
+
+
+def test_stable_runs_window():
+    history = _history("FPPPP")
+
+    assert capture_policy.choose_capture_level(NODEID, history, 1, stable_runs=4)[0] == CAPTURE_NONE
+    assert capture_policy.choose_capture_level(NODEID, history, 1, stable_runs=5) == (CAPTURE_FULL, "flaky")
+
+
+def test_record_outcome_keeps_the_last_window():
+    history = _history()
+    for i in range(capture_policy.HISTORY_WINDOW + 2):
+        capture_policy.record_outcome(history, NODEID, passed=i != 0)
+    capture_policy.record_outcome(history, NODEID, passed=False)
+
+    assert history["tests"][NODEID] == "P" * (capture_policy.HISTORY_WINDOW - 1) + "F"
+
+
+def test_record_cost_running_average_is_capped():
+    history = _history()
+    capture_policy.record_cost(history, CAPTURE_FULL, 2.0, 1000)
+    capture_policy.record_cost(history, CAPTURE_FULL, 4.0, 3000)
+
+    assert history["costs"][CAPTURE_FULL] == {"count": 2, "seconds": 3.0, "bytes": 2000.0}
+
+    for _ in range(capture_policy.COST_SAMPLES_CAP * 2):
+        capture_policy.record_cost(history, CAPTURE_FULL, 1.0, 0)
+    cost = history["costs"][CAPTURE_FULL]
+    assert cost["count"] == capture_policy.COST_SAMPLES_CAP
+    # old samples fade out instead of dominating the average forever
+    assert cost["seconds"] == pytest.approx(1.0, abs=0.2)
+
+
+def test_summarize_savings():
+    assert capture_policy.summarize_savings(_history(), {CAPTURE_NONE: 3}) is None
+
+    costs = {
+        CAPTURE_FULL: {"count": 5, "seconds": 2.0, "bytes": 1000.0},
+        CAPTURE_TRACE: {"count": 5, "seconds": 0.5, "bytes": 200.0},
+    }
+    seconds, size = capture_policy.summarize_savings(
+        _history(costs=costs), {CAPTURE_NONE: 2, CAPTURE_TRACE: 1, CAPTURE_FULL: 4},
+    )
+
+    assert seconds == pytest.approx(2 * 2.0 + 1 * 1.5)
+    assert size == pytest.approx(2 * 1000 + 1 * 800)
+
+
+def test_trace_options():
+    assert capture_policy.trace_options(CAPTURE_NONE) is None
+    assert capture_policy.trace_options(CAPTURE_TRACE) == {"screenshots": False, "snapshots": True, "sources": False}
+    assert capture_policy.trace_options(CAPTURE_FULL, screenshots=False) == \
+        {"screenshots": False, "snapshots": True, "sources": True}
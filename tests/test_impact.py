@@ -0,0 +1,305 @@
+import subprocess
+import sys
+
+from helpers import impact
+
+INVENTORY_PAGE = '''class InventoryPage:
+    def __init__(self, page):
+        self.page = page
+
+    def add_product_to_cart(self, product_id):
+        self.page.click(product_id)
+
+    def open_cart(self):
+        self.page.click("cart")
+
+    @property
+    def title(self):
+        return self.page.title()
+'''
+
+CHECKOUT_PAGE = '''class CheckoutOverviewPage:
+    def __init__(self, page):
+        self.page = page
+
+    def finish_checkout(self):
+        self.page.click("finish")
+'''
+
+TEST_CHECKOUT = '''def test_add_item_and_checkout():
+    pass
+'''
+
+ADD = "tests/test_checkout.py::test_add_item_and_checkout"
+LOGIN = "tests/test_login.py::test_standard_user_can_login"
+BASELINE = "tests/snapshots/inventory_list-chromium-linux.png"
+
+IMPACT_MAP = {
+    "version": impact.MAP_VERSION,
+    "tests": {
+        ADD: [
+            "pages/inventory_page.py::InventoryPage.__init__",
+            "pages/inventory_page.py::InventoryPage.add_product_to_cart",
+            "pages/checkout_page.py::CheckoutOverviewPage.finish_checkout",
+            BASELINE,
+        ],
+        LOGIN: [
+            "pages/inventory_page.py::InventoryPage.__init__",
+            "pages/inventory_page.py::InventoryPage.open_cart",
+        ],
+    },
+}
+
+
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+def _write(repo, path, content):
+    target = repo / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(content)
+
+
+def _make_repo(tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo, "pages/__init__.py", "")
+    _write(repo, "pages/inventory_page.py", INVENTORY_PAGE)
+    _write(repo, "pages/checkout_page.py", CHECKOUT_PAGE)
+    _write(repo, "tests/test_checkout.py", TEST_CHECKOUT)
+    _write(repo, "conftest.py", "")
+    _write(repo, "README.md", "docs\n")
+    _write(repo, BASELINE, "png")
+    _git(repo, "init", "-q")
+    _git(repo, "add", "-A")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "base")
+    return repo
+
+
+def _select(repo, nodeids=(ADD, LOGIN), impact_map=IMPACT_MAP):
+    changes = impact.get_changes("HEAD", str(repo))
+    return impact.select_tests(list(nodeids), impact_map, changes, "HEAD", str(repo))
+
+
+def test_get_changes_modified_inserted_and_deleted_lines(tmp_path):
+    repo = _make_repo(tmp_path)
+    # line 6 modified, a line appended after line 13, method finish_checkout (lines 5-6) deleted
+    _write(repo, "pages/inventory_page.py", INVENTORY_PAGE.replace("click(product_id)", "click(product_id, force=True)")
+           + "    # trailing comment\n")
+    _write(repo, "pages/checkout_page.py", CHECKOUT_PAGE.split("\n    def finish_checkout")[0] + "\n")
+
+    changes = impact.get_changes("HEAD", str(repo))
+
+    assert changes["pages/inventory_page.py"] == {"old": [(6, 6)], "new": [(6, 6), (14, 14)], "whole": False}
+    checkout = changes["pages/checkout_page.py"]
+    assert checkout["new"] == [] and checkout["whole"] is False
+    assert checkout["old"] == [(5, 6)]
+
+
+def test_get_changes_special_paths_and_noprefix_config(tmp_path):
+    repo = _make_repo(tmp_path)
+    for name in ("pages/with space.py", "pages/h\u00e9llo.py", 'pages/q"t.py'):
+        _write(repo, name, "X = 1\n")
+    _git(repo, "add", "-A")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "special paths")
+    _git(repo, "config", "diff.noprefix", "true")
+    for name in ("pages/with space.py", "pages/h\u00e9llo.py", 'pages/q"t.py'):
+        _write(repo, name, "X = 2\n")
+    _write(repo, "pages/n\u00e9w page.py", "Y = 1\n")
+
+    changes = impact.get_changes("HEAD", str(repo))
+
+    assert sorted(changes) == ["pages/h\u00e9llo.py", "pages/n\u00e9w page.py", 'pages/q"t.py', "pages/with space.py"]
+    assert changes["pages/with space.py"] == {"old": [(1, 1)], "new": [(1, 1)], "whole": False}
+    assert changes["pages/n\u00e9w page.py"]["whole"] is True
+
+
+def test_get_changes_new_deleted_and_untracked_files(tmp_path):
+    repo = _make_repo(tmp_path)
+    _write(repo, "pages/cart_page.py", "class CartPage:\n    pass\n")
+    _git(repo, "add", "pages/cart_page.py")
+    (repo / "tests/test_checkout.py").unlink()
+    _write(repo, "tests/test_new.py", "def test_new():\n    pass\n")
+
+    changes = impact.get_changes("HEAD", str(repo))
+
+    assert changes["pages/cart_page.py"]["whole"] is True
+    assert changes["tests/test_checkout.py"]["whole"] is True
+    assert changes["tests/test_checkout.py"]["old"] == [(1, 2)]
+    assert changes["tests/test_new.py"] == {"old": [], "new": [], "whole": True}
+
+
+def test_symbols_for_ranges():
+    path = "pages/inventory_page.py"
+    source = "import os\n\n\n" + INVENTORY_PAGE.replace("    def open_cart", "    @property\n    def open_cart")
+
+    assert impact._symbols_for_ranges(source, path, [(9, 9)]) == {f"{path}::InventoryPage.add_product_to_cart"}
+    # a decorator line belongs to the decorated method
+    assert impact._symbols_for_ranges(source, path, [(11, 11)]) == {f"{path}::InventoryPage.open_cart"}
+    # a range spanning two methods -> whole class
+    assert impact._symbols_for_ranges(source, path, [(6, 9)]) == {f"{path}::InventoryPage."}
+    # module level (imports, blank lines) -> whole module
+    assert impact._symbols_for_ranges(source, path, [(1, 1)]) == {f"{path}::"}
+    assert impact._symbols_for_ranges(source, path, [(2, 2)]) == {f"{path}::"}
+
+
+def test_record_file_usage_only_while_recording(tmp_path, monkeypatch):
+    baseline = tmp_path / BASELINE
+    impact.reset_used_symbols()
+
+    monkeypatch.setattr(impact, "_rootdir", None)
+    impact.record_file_usage(str(baseline))
+    assert impact.used_symbols() == []
+
+    monkeypatch.setattr(impact, "_rootdir", str(tmp_path))
+    impact.record_file_usage(str(baseline))
+    assert impact.used_symbols() == [BASELINE]
+    impact.reset_used_symbols()
+
+
+def test_instrument_records_properties_static_and_class_methods(tmp_path, monkeypatch):
+    package = tmp_path / "impact_fixture_pages"
+    _write(tmp_path, "impact_fixture_pages/__init__.py", "")
+    _write(tmp_path, "impact_fixture_pages/account_page.py", '''class AccountPage:
+    def __init__(self):
+        self._name = "standard_user"
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+
+    @staticmethod
+    def url():
+        return "/account"
+
+    @classmethod
+    def create(cls):
+        return cls()
+''')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(impact, "_rootdir", None)
+
+    assert impact.instrument_page_objects(str(tmp_path), package=package.name) == 4  # the property counts once
+    # instrumenting again wraps nothing twice
+    assert impact.instrument_page_objects(str(tmp_path), package=package.name) == 0
+
+    impact.reset_used_symbols()
+    from impact_fixture_pages.account_page import AccountPage
+    page = AccountPage.create()
+    page.name = page.name + "!"
+    assert AccountPage.url() == "/account" and page.name == "standard_user!"
+
+    prefix = "impact_fixture_pages/account_page.py::AccountPage."
+    assert impact.used_symbols() == [prefix + name for name in ("__init__", "create", "name", "url")]
+    impact.reset_used_symbols()
+    del sys.modules["impact_fixture_pages.account_page"], sys.modules["impact_fixture_pages"]
+
+
+def test_select_property_change(tmp_path):
+    repo = _make_repo(tmp_path)
+    _write(repo, "pages/inventory_page.py", INVENTORY_PAGE.replace("self.page.title()", "self.page.title().strip()"))
+
+    # recorded: only the tests that read the property
+    impact_map = {"version": impact.MAP_VERSION, "tests": dict(IMPACT_MAP["tests"])}
+    impact_map["tests"][LOGIN] = impact_map["tests"][LOGIN] + ["pages/inventory_page.py::InventoryPage.title"]
+    assert _select(repo, impact_map=impact_map)[0] == [LOGIN]
+
+    # not recorded by anyone (e.g. a map from before properties were recorded): every class user runs
+    assert _select(repo)[0] == [ADD, LOGIN]
+
+
+def test_select_method_change_selects_only_its_users(tmp_path):
+    repo = _make_repo(tmp_path)
+    _write(repo, "pages/inventory_page.py", INVENTORY_PAGE.replace('click("cart")', 'click(".cart")'))
+
+    selected, _ = _select(repo)
+
+    assert selected == [LOGIN]
+
+
+def test_select_deleted_method_selects_its_users(tmp_path):
+    repo = _make_repo(tmp_path)
+    _write(repo, "pages/checkout_page.py", CHECKOUT_PAGE.split("\n    def finish_checkout")[0] + "\n")
+
+    selected, _ = _select(repo)
+
+    assert selected == [ADD]
+
+
+def test_select_class_level_change_selects_all_class_users(tmp_path):
+    repo = _make_repo(tmp_path)
+    _write(repo, "pages/inventory_page.py", INVENTORY_PAGE.replace(
+        "class InventoryPage:\n", "class InventoryPage:\n    url = '/inventory.html'\n\n"))
+
+    selected, _ = _select(repo)
+
+    assert selected == [ADD, LOGIN]
+
+
+def test_select_changed_and_unknown_tests(tmp_path):
+    repo = _make_repo(tmp_path)
+    _write(repo, "tests/test_checkout.py", TEST_CHECKOUT + "\n# comment\n")
+
+    selected, _ = _select(repo, nodeids=(ADD, LOGIN, "tests/test_new.py::test_new"))
+
+    assert selected == [ADD, "tests/test_new.py::test_new"]
+
+
+def test_select_changed_baseline_selects_its_users(tmp_path):
+    repo = _make_repo(tmp_path)
+    _write(repo, BASELINE, "new png")
+
+    selected, _ = _select(repo)
+
+    assert selected == [ADD]
+
+
+def test_select_ignores_docs_only_changes(tmp_path):
+    repo = _make_repo(tmp_path)
+    _write(repo, "README.md", "more docs\n")
+    _write(repo, ".github/workflows/ci.yml", "on: push\n")
+
+    selected, _ = _select(repo)
+
+    assert selected == []
+
+
+def test_select_full_run_cases(tmp_path):
+    repo = _make_repo(tmp_path)
+
+    _write(repo, "conftest.py", "# fixtures changed\n")
+    assert _select(repo)[0] is None
+    _git(repo, "checkout", "-q", "--", "conftest.py")
+
+    # pages/__init__.py is never recorded as a symbol, so it can't be mapped to tests
+    _write(repo, "pages/__init__.py", "from pages.inventory_page import InventoryPage\n")
+    assert _select(repo)[0] is None
+    _git(repo, "checkout", "-q", "--", "pages/__init__.py")
+
+    # unknown non-Python file (possible test data), including a baseline no recorded test compared against
+    _write(repo, "tests/data/users.csv", "standard_user\n")
+    assert _select(repo)[0] is None
+    (repo / "tests/data/users.csv").unlink()
+    _write(repo, "tests/snapshots/checkout_complete-chromium-linux.png", "png")
+    assert _select(repo)[0] is None
+    (repo / "tests/snapshots/checkout_complete-chromium-linux.png").unlink()
+
+    # shared, non-test modules under tests/ define no tests but are imported by them
+    _write(repo, "tests/helpers_util.py", "def wait():\n    pass\n")
+    assert _select(repo)[0] is None
+    (repo / "tests/helpers_util.py").unlink()
+    _write(repo, "tests/__init__.py", "X = 1\n")
+    assert _select(repo)[0] is None
+    (repo / "tests/__init__.py").unlink()
+
+    # framework module outside pages/ and tests/
+    _write(repo, "helpers/util.py", "X = 1\n")
+    assert _select(repo)[0] is None
+    (repo / "helpers/util.py").unlink()
+
+    # no map recorded yet
+    assert _select(repo, impact_map={"version": impact.MAP_VERSION, "tests": {}})[0] is None
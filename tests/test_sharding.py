@@ -0,0 +1,169 @@
+import os
+import random
+
+import pytest
+
+from helpers import sharding
+
+NODEIDS = [f"tests/test_module_{i // 10}.py::test_case_{i}" for i in range(200)]
+
+
+def _durations(nodeids, seed=0):
+    rnd = random.Random(seed)
+    return {"version": sharding.DURATIONS_VERSION, "tests": {n: round(rnd.uniform(0.5, 10.0), 3) for n in nodeids}}
+
+
+def _moved(before, after):
+    return sum(1 for nodeid in before if nodeid in after and before[nodeid] != after[nodeid])
+
+
+def test_plan_is_deterministic():
+    durations = _durations(NODEIDS)
+    shuffled = list(NODEIDS)
+    random.Random(1).shuffle(shuffled)
+
+    plan = sharding.build_plan(NODEIDS, durations, 4)
+
+    assert sharding.build_plan(shuffled, durations, 4) == plan
+    assert set(plan) == set(NODEIDS)
+    assert set(plan.values()) == {1, 2, 3, 4}
+
+
+def test_plan_is_balanced():
+    durations = _durations(NODEIDS)
+    plan = sharding.build_plan(NODEIDS, durations, 4)
+
+    loads = [sharding.estimated_load(plan, durations, shard) for shard in range(1, 5)]
+    capacity = sum(loads) / 4 * (1 + sharding.SHARD_SLACK)
+    assert max(loads) <= capacity
+
+
+def test_adding_or_removing_tests_moves_few_others():
+    # 5 of 200 tests added / removed, over several duration sets and shard counts
+    moves = []
+    for seed in range(10):
+        durations = _durations(NODEIDS, seed)
+        for total in (2, 4, 8):
+            plan = sharding.build_plan(NODEIDS, durations, total)
+            added = NODEIDS + [f"tests/test_new.py::test_new_{i}" for i in range(5)]
+            moves.append(_moved(plan, sharding.build_plan(added, durations, total)))
+            moves.append(_moved(plan, sharding.build_plan(NODEIDS[5:], durations, total)))
+
+    # bounded loads cost about one extra move per added / removed test, never a reshuffle
+    assert max(moves) <= len(NODEIDS) * 0.1
+    assert sum(moves) / len(moves) <= 10
+
+
+def test_plan_uses_median_duration_for_unknown_tests():
+    durations = {"version": sharding.DURATIONS_VERSION, "tests": {"a": 1.0, "b": 2.0, "c": 30.0}}
+    plan = sharding.build_plan(["a", "b", "c", "new"], durations, 2)
+
+    # "c" alone fills a shard; the unknown test weighs as the median (2.0) and joins "a" and "b"
+    assert plan["a"] == plan["b"] == plan["new"] != plan["c"]
+
+
+@pytest.mark.parametrize("value", ["1/4", "4/4", " 2/3"])
+def test_parse_shard_valid(value):
+    index, total = sharding.parse_shard(value)
+    assert 1 <= index <= total
+
+
+@pytest.mark.parametrize("value", ["5/4", "0/2", "1/0", "a/b", "1-2", "1/2/3", "", None])
+def test_parse_shard_invalid(value):
+    with pytest.raises(ValueError, match="invalid shard"):
+        sharding.parse_shard(value)
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_merge_results_flattens_shards_and_later_source_wins(tmp_path):
+    attempt_1 = tmp_path / "attempt_1"
+    attempt_2 = tmp_path / "attempt_2"
+    _write(attempt_1 / "shard_1_of_2" / "a-result.json", "a1")
+    _write(attempt_1 / "shard_2_of_2" / "b-result.json", "b1")
+    _write(attempt_1 / "shard_2_of_2" / "environment.properties", "env from attempt 1")
+    _write(attempt_2 / "shard_2_of_2" / "environment.properties", "env from attempt 2")
+    merged = tmp_path / "merged"
+
+    stats = sharding.merge_results([str(attempt_1), str(attempt_2)], str(merged))
+
+    assert sorted(os.listdir(merged)) == ["a-result.json", "b-result.json", "environment.properties"]
+    assert _read(merged / "environment.properties") == "env from attempt 2"
+    assert stats["linked"] + stats["copied"] == 4
+    assert os.path.samefile(merged / "a-result.json", attempt_1 / "shard_1_of_2" / "a-result.json") \
+        or stats["copied"]
+
+    # merging again finds everything already in place
+    stats = sharding.merge_results([str(attempt_2)], str(merged))
+    assert stats == {"linked": 0, "copied": 0, "skipped": 1}
+
+
+def test_merge_results_does_not_descend_into_destination(tmp_path):
+    results = tmp_path / "results"
+    _write(results / "shard_1_of_1" / "a-result.json", "a")
+    merged = results / "merged"
+
+    sharding.merge_results([str(results)], str(merged))
+    stats = sharding.merge_results([str(results)], str(merged))
+
+    assert os.listdir(merged) == ["a-result.json"]
+    assert stats == {"linked": 0, "copied": 0, "skipped": 1}
+
+
+def test_plan_fingerprint():
+    durations = _durations(NODEIDS)
+    shuffled = list(NODEIDS)
+    random.Random(1).shuffle(shuffled)
+    fingerprint = sharding.plan_fingerprint(NODEIDS, durations, 4)
+
+    assert sharding.plan_fingerprint(shuffled, durations, 4) == fingerprint
+    assert sharding.plan_fingerprint(NODEIDS, durations, 3) != fingerprint
+    assert sharding.plan_fingerprint(NODEIDS[1:], durations, 4) != fingerprint
+    drifted = _durations(NODEIDS)
+    drifted["tests"][NODEIDS[0]] += 1
+    assert sharding.plan_fingerprint(NODEIDS, drifted, 4) != fingerprint
+    assert sharding.durations_fingerprint(drifted) != sharding.durations_fingerprint(durations)
+
+
+def test_shard_durations_are_merged_into_the_shared_file(tmp_path):
+    shard_dir = tmp_path / "durations"
+    shared = str(tmp_path / "cache" / "durations.json")
+    sharding.save_durations(shared, {"version": sharding.DURATIONS_VERSION, "tests": {"a": 2.0, "c": 5.0}})
+
+    sharding.save_shard_durations(str(shard_dir / "shard_1_of_2.json"), {"a": 4.0})
+    sharding.save_shard_durations(str(shard_dir / "shard_2_of_2.json"), {"b": 1.0})
+    # a re-run attempt of shard 2 updates its own file
+    sharding.save_shard_durations(str(shard_dir / "shard_2_of_2.json"), {"b": 3.0, "d": 0.5})
+    assert sharding.load_durations(str(shard_dir / "shard_2_of_2.json"))["tests"] == {"b": 3.0, "d": 0.5}
+
+    assert sharding.merge_durations([str(shard_dir)], shared) == 3
+
+    assert sharding.load_durations(shared)["tests"] == {"a": 3.0, "b": 3.0, "c": 5.0, "d": 0.5}
+
+
+def test_main_merges_results_and_durations(tmp_path, capsys):
+    _write(tmp_path / "attempt_1" / "shard_1_of_2" / "a-result.json", "a")
+    sharding.save_shard_durations(str(tmp_path / "durations" / "shard_1_of_2.json"), {"a": 1.0})
+    shared = str(tmp_path / "durations.json")
+
+    assert sharding.main(["merge", str(tmp_path / "attempt_1"), "-o", str(tmp_path / "merged"),
+                          "--durations", str(tmp_path / "durations"), "--durations-file", shared]) == 0
+
+    assert os.listdir(tmp_path / "merged") == ["a-result.json"]
+    assert sharding.load_durations(shared)["tests"] == {"a": 1.0}
+    assert "Folded 1 shard test durations" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("argv", [["merge"], ["merge", "results"]])
+def test_main_usage_errors(argv):
+    with pytest.raises(SystemExit):
+        sharding.main(argv)
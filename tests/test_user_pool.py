@@ -0,0 +1,120 @@
+import json
+import os
+
+import pytest
+
+from helpers import user_pool
+from model.user import User
+
+USERS = [User("standard_user", "secret"), User("visual_user", "secret")]
+
+
+def test_load_users_from_value_and_text_file(tmp_path):
+    users_file = tmp_path / "users.txt"
+    users_file.write_text("# accounts\nproblem_user:other\n\nstandard_user\n")
+
+    users = user_pool.load_users("standard_user, visual_user:own", str(users_file), default_password="secret")
+
+    assert users == [User("standard_user", "secret"), User("visual_user", "own"), User("problem_user", "other")]
+
+
+def test_load_users_from_json_file(tmp_path):
+    users_file = tmp_path / "users.json"
+    users_file.write_text(json.dumps([{"username": "standard_user"}, {"username": "visual_user", "password": "own"}]))
+
+    users = user_pool.load_users(users_file=str(users_file), default_password="secret")
+
+    assert users == [User("standard_user", "secret"), User("visual_user", "own")]
+
+
+def test_load_users_without_password_fails():
+    with pytest.raises(RuntimeError, match="'standard_user' has no password"):
+        user_pool.load_users("standard_user", default_password=None)
+
+
+@pytest.mark.parametrize("items, message", [
+    ([{"username": "standard_user"}], "'standard_user' has no password"),
+    ([{"password": "secret"}], "has no username"),
+    (["standard_user"], "is not an object"),
+])
+def test_load_users_invalid_json_entry_fails(tmp_path, items, message):
+    users_file = tmp_path / "users.json"
+    users_file.write_text(json.dumps(items))
+
+    with pytest.raises(RuntimeError, match=message):
+        user_pool.load_users(users_file=str(users_file), default_password=None)
+
+
+def test_two_leases_get_different_users_then_timeout(tmp_path):
+    lock_dir = str(tmp_path / "leases")
+    first = user_pool.lease_user(USERS, lock_dir, timeout=1, owner="gw0")
+    second = user_pool.lease_user(USERS, lock_dir, timeout=1, owner="gw1")
+    try:
+        assert {first.user.username, second.user.username} == {"standard_user", "visual_user"}
+        with open(os.path.join(lock_dir, "standard_user.lock"), encoding="utf-8") as f:
+            assert f.read().startswith(("gw0 pid=", "gw1 pid="))
+
+        with pytest.raises(RuntimeError, match="No free account"):
+            user_pool.lease_user(USERS, lock_dir, timeout=0.2, poll_interval=0.05)
+    finally:
+        first.release()
+        second.release()
+
+
+def test_released_user_can_be_leased_again(tmp_path):
+    lock_dir = str(tmp_path / "leases")
+    first = user_pool.lease_user(USERS, lock_dir, timeout=1, preferred=1)
+    assert first.user.username == "visual_user"
+
+    first.release()
+    first.release()  # releasing twice is harmless
+    again = user_pool.lease_user(USERS, lock_dir, timeout=1, preferred=1)
+
+    assert again.user.username == "visual_user"
+    again.release()
+
+
+def test_empty_pool_fails(tmp_path):
+    with pytest.raises(RuntimeError, match="empty"):
+        user_pool.lease_user([], str(tmp_path), timeout=1)
+
+
+class FakeMsvcrt:
+    """msvcrt.locking stand-in: one lock per file, held until explicitly unlocked (like Windows)."""
+    LK_UNLCK = 0
+    LK_NBLCK = 2
+
+    def __init__(self):
+        self.locked = {}
+
+    def locking(self, fd, mode, nbytes):
+        assert nbytes == 1 and os.lseek(fd, 0, os.SEEK_CUR) == 0
+        key = os.fstat(fd).st_ino
+        if mode == self.LK_NBLCK:
+            if key in self.locked:
+                raise OSError("locked")
+            self.locked[key] = fd
+        elif mode == self.LK_UNLCK:
+            assert self.locked.pop(key) == fd
+
+
+def test_windows_locking(tmp_path, monkeypatch):
+    fake = FakeMsvcrt()
+    monkeypatch.setattr(user_pool, "fcntl", None)
+    monkeypatch.setattr(user_pool, "msvcrt", fake, raising=False)
+    lock_dir = str(tmp_path / "leases")
+
+    first = user_pool.lease_user(USERS, lock_dir, timeout=1)
+    second = user_pool.lease_user(USERS, lock_dir, timeout=1)
+    assert {first.user.username, second.user.username} == {"standard_user", "visual_user"}
+    with pytest.raises(RuntimeError, match="No free account"):
+        user_pool.lease_user(USERS, lock_dir, timeout=0.1, poll_interval=0.05)
+
+    first.release()
+    again = user_pool.lease_user(USERS, lock_dir, timeout=1)
+    assert again.user == first.user
+    # lock files are left untouched (no owner info written over the locked byte)
+    assert os.path.getsize(os.path.join(lock_dir, "standard_user.lock")) == 0
+    again.release()
+    second.release()
+    assert fake.locked == {}
@@ -0,0 +1,95 @@
+import io
+import os
+import sys
+
+import pytest
+
+from helpers import impact, visual
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png(color, size=(20, 10)):
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeTarget:
+    """Stands in for a Playwright Page / Locator."""
+
+    def __init__(self, png):
+        self.png = png
+
+    def screenshot(self, **kwargs):
+        return self.png
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(visual, "_output_namespace", os.path.join("attempt_2", "shard_1_of_2", "gw1"))
+    return str(tmp_path / "snapshots"), str(tmp_path / "diffs")
+
+
+def test_update_then_match(dirs):
+    baseline_dir, diff_dir = dirs
+    visual.assert_snapshot(FakeTarget(_png("red")), "cart", baseline_dir, diff_dir, update=True)
+
+    result = visual.assert_snapshot(FakeTarget(_png("red")), "cart", baseline_dir, diff_dir)
+
+    assert result.matched
+    assert not os.path.exists(diff_dir)
+
+
+def _failure_prefix(request, name):
+    # pytest keeps the running test in PYTEST_CURRENT_TEST
+    return visual._safe_name(request.node.nodeid.replace("::", "__")) + f"__{name}"
+
+
+def test_failure_images_are_namespaced_and_named_after_the_test(dirs, request):
+    baseline_dir, diff_dir = dirs
+    visual.assert_snapshot(FakeTarget(_png("red")), "cart", baseline_dir, diff_dir, update=True)
+
+    with pytest.raises(AssertionError, match="pixels differ"):
+        visual.assert_snapshot(FakeTarget(_png("blue")), "cart", baseline_dir, diff_dir)
+
+    output_dir = os.path.join(diff_dir, "attempt_2", "shard_1_of_2", "gw1")
+    prefix = _failure_prefix(request, "cart")
+    assert prefix == "tests_test_visual.py__test_failure_images_are_namespaced_and_named_after_the_test__cart"
+    assert sorted(os.listdir(output_dir)) == [f"{prefix}-actual.png", f"{prefix}-diff.png", f"{prefix}-expected.png"]
+
+
+def test_missing_baseline_saves_actual(dirs, request):
+    baseline_dir, diff_dir = dirs
+
+    with pytest.raises(AssertionError, match="Missing visual baseline"):
+        visual.assert_snapshot(FakeTarget(_png("red")), "cart", baseline_dir, diff_dir)
+
+    output_dir = os.path.join(diff_dir, "attempt_2", "shard_1_of_2", "gw1")
+    assert os.listdir(output_dir) == [f"{_failure_prefix(request, 'cart')}-actual.png"]
+
+
+def test_masked_difference_matches(dirs):
+    baseline_dir, diff_dir = dirs
+    expected = Image.new("RGBA", (20, 10), "red")
+    actual = expected.copy()
+    actual.paste("blue", (0, 0, 5, 5))
+    buffer = io.BytesIO()
+    actual.save(buffer, format="PNG")
+    visual.assert_snapshot(FakeTarget(_png("red")), "cart", baseline_dir, diff_dir, update=True)
+
+    result = visual.assert_snapshot(FakeTarget(buffer.getvalue()), "cart", baseline_dir, diff_dir, mask=[(0, 0, 5, 5)])
+
+    assert result.matched
+
+
+def test_baseline_usage_is_recorded(dirs, tmp_path, monkeypatch):
+    baseline_dir, diff_dir = dirs
+    monkeypatch.setattr(impact, "_rootdir", str(tmp_path))
+    impact.reset_used_symbols()
+
+    visual.assert_snapshot(FakeTarget(_png("red")), "cart", baseline_dir, diff_dir, browser="firefox", update=True)
+
+    assert impact.used_symbols() == [f"snapshots/cart-firefox-{sys.platform}.png"]
+    impact.reset_used_symbols()